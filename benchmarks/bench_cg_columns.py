@@ -0,0 +1,38 @@
+"""Column generation iterations and time against the number of columns per round.
+
+Run from the repository root with ``python -m benchmarks.bench_cg_columns``.
+Every round adds up to ``max_columns`` patterns from DP pricing, so fewer master
+re-solves are needed on wide item ranges.
+"""
+from typing import Dict, List
+
+from bpp1d.models.mip import ColumnGeneration
+
+CAPACITY = 100
+NUM_ITEMS = 1000
+ITEM_SETS = {
+    "range(10, 60)": list(range(10, 60)),
+    "range(5, 80)": list(range(5, 80)),
+}
+MAX_COLUMNS = [1, 5, 10, 20]
+
+
+def _uniform_demands(items: List[int]) -> Dict[int, int]:
+    return {i: NUM_ITEMS // len(items) for i in items}
+
+
+def main():
+    print(f"{'items':>14} {'k':>4} {'iterations':>11} {'columns':>8} {'time (s)':>9} {'bins':>6}")
+    for name, items in ITEM_SETS.items():
+        demands = _uniform_demands(items)
+        for k in MAX_COLUMNS:
+            cg = ColumnGeneration(CAPACITY, demands, max_columns=k)
+            plan = cg.solve(max_iter=1000)
+            assert plan is not None
+            info = cg.info
+            print(f"{name:>14} {k:>4} {info['cg_iterations']:>11} {info['cg_columns']:>8} "
+                    f"{info['cg_time']:>9.2f} {sum(plan.values()):>6}")
+
+
+if __name__ == "__main__":
+    main()
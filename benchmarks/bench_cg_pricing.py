@@ -0,0 +1,39 @@
+"""Total column generation time with DP pricing against CBC pricing.
+
+Run from the repository root with ``python -m benchmarks.bench_cg_pricing``.
+The master problem is solved the same way in both runs, so the difference is
+the cost of pricing.
+"""
+import time
+from typing import Dict, List
+
+from bpp1d.models.mip import ColumnGeneration
+
+CAPACITY = 100
+NUM_ITEMS = 1000
+ITEM_SETS = {
+    "range(10, 60, 5)": list(range(10, 60, 5)),
+    "range(10, 60)": list(range(10, 60)),
+}
+
+
+def _uniform_demands(items: List[int]) -> Dict[int, int]:
+    return {i: NUM_ITEMS // len(items) for i in items}
+
+
+def _time_cg(demands: Dict[int, int], pricing: str) -> float:
+    start = time.perf_counter()
+    plan = ColumnGeneration(CAPACITY, demands, pricing=pricing).solve()
+    assert plan is not None
+    return time.perf_counter() - start
+
+
+def main():
+    print(f"{'items':>18} {'cbc pricing (s)':>16} {'dp pricing (s)':>16}")
+    for name, items in ITEM_SETS.items():
+        demands = _uniform_demands(items)
+        print(f"{name:>18} {_time_cg(demands, 'cbc'):16.2f} {_time_cg(demands, 'dp'):16.2f}")
+
+
+if __name__ == "__main__":
+    main()
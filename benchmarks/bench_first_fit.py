@@ -0,0 +1,52 @@
+"""Per-item cost of first fit choices as the number of open bins grows.
+
+Run from the repository root with ``python -m benchmarks.bench_first_fit``.
+Each round opens ``num_bins`` bins left with a small residual, then times
+packing a stream of items that mostly fit only near the end of the bin list.
+"""
+import random
+import time
+from typing import List
+
+from bpp1d.structure import BppBin
+from bpp1d.utils.heuristic_choice import FirstFitChoice, HeuristicChoiceFn, first_fit_choice
+
+CAPACITY = 100
+NUM_ITEMS = 2000
+BIN_COUNTS = [10 ** 3, 10 ** 4, 10 ** 5, 2 * 10 ** 5]
+# the linear scan is quadratic overall, skip it beyond this size
+MAX_LINEAR_BINS = 10 ** 4
+
+
+def _open_bins(num_bins: int, rng: random.Random) -> List[BppBin]:
+    return [BppBin(CAPACITY, [CAPACITY - rng.randint(1, 10)]) for _ in range(num_bins)]
+
+
+def _time_per_item(choice_fn: HeuristicChoiceFn, num_bins: int, seed: int = 0) -> float:
+    rng = random.Random(seed)
+    bins = _open_bins(num_bins, rng)
+    items = [rng.randint(5, 40) for _ in range(NUM_ITEMS)]
+    # first call builds the index, it is not part of the per-item cost
+    choice_fn(CAPACITY, bins)
+
+    start = time.perf_counter()
+    for item in items:
+        choice = choice_fn(item, bins)
+        if choice < 0:
+            bins.append(BppBin(CAPACITY, [item]))
+        else:
+            bins[choice].pack(item)
+    return (time.perf_counter() - start) / NUM_ITEMS
+
+
+def main():
+    print(f"{'bins':>8} {'segment tree (us/item)':>24} {'linear scan (us/item)':>24}")
+    for num_bins in BIN_COUNTS:
+        indexed = _time_per_item(FirstFitChoice(), num_bins) * 1e6
+        linear = (f"{_time_per_item(first_fit_choice, num_bins) * 1e6:24.1f}"
+                    if num_bins <= MAX_LINEAR_BINS else f"{'-':>24}")
+        print(f"{num_bins:>8} {indexed:24.1f} {linear}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""Per-item decision latency of CGReplan with blocking and background replans.
+
+Run from the repository root with ``python -m benchmarks.bench_replan_latency``.
+Needs ``bpp3d_dataset`` for the item distribution. Column patterns are not
+enumerated, so every replan that is not cached runs column generation.
+"""
+import random
+
+from bpp3d_dataset.utils.distributions import Discrete
+
+from bpp1d.models.cg_replan import CGReplan
+
+CAPACITY = 100
+NUM_ITEMS = 20000
+ITEMS = list(range(10, 60))
+
+
+def main():
+    rng = random.Random(0)
+    instance = [rng.choice(ITEMS) for _ in range(NUM_ITEMS)]
+    distribution = Discrete([1 / len(ITEMS)] * len(ITEMS), ITEMS)
+    print(f"{'mode':>8} {'p50 (us)':>9} {'p99 (us)':>9} {'max (ms)':>9} {'replans':>8} {'bins':>6}")
+    for async_replan in [False, True]:
+        model = CGReplan(CAPACITY, instance, distribution, consider_opened_bins=True,
+                            cg_options={"enumeration_limit": 0, "max_columns": 5, "finish": "round"},
+                            async_replan=async_replan, end_heuristic_theshold=0.02)
+        model.build()
+        solution, info = model.solve()
+        assert info is not None
+        print(f"{'async' if async_replan else 'sync':>8} {info['latency_p50'] * 1e6:9.1f} "
+                f"{info['latency_p99'] * 1e6:9.1f} {info['latency_max'] * 1e3:9.1f} "
+                f"{info['replan_count']:>8} {solution.num_bins:>6}")
+
+
+if __name__ == "__main__":
+    main()
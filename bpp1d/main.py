@@ -11,6 +11,7 @@ from bpp3d_dataset.utils.distributions import generate_discrete_dist
 from bpp3d_dataset.problems import Problem, Bpp1DRandomInitiator
 from bpp1d.models.cg_fit import CGFit
 from bpp1d.models.oracle import Oracle
+from bpp1d.models.mip.plan_table import PlanTable, demand_grid
 
 from bpp1d.models.rl.train import RLHyperparam, train_ppo
 from bpp1d.structure.solution import Solution
@@ -27,6 +28,9 @@ app.add_typer(rl_app, name="rl")
 exp_app = typer.Typer()
 app.add_typer(exp_app, name="exp")
 
+plan_app = typer.Typer()
+app.add_typer(plan_app, name="plan")
+
 DEFAULT_RL_TRAIN_ITEMS = [i for i in range(10, 60, 5)]
 DEFAULT_RL_CAPACITY = 100
 DEFAULT_TRAIN_ENV_NUM = 100
@@ -83,6 +87,42 @@ def rl_train(
     print(res)
 
 
+@plan_app.command("precompute")
+def plan_precompute(
+    output: Annotated[Path, Argument(help="plan table file (npz)")] = Path("plan_table.npz"),
+    distribution_choice: Annotated[str, 
+                                    Option("-d", help="Distribution of items")] 
+                                        = 'uniform',
+    items:Annotated[Optional[List[int]], Option("-i", "--item", help="item kinds in the problem")] 
+                                = None,
+    item_range: Annotated[Optional[List[int]], Option("--ir", "--item-range", help="Item range")] = None,
+    probs:Annotated[Optional[List[float]], Option("-p", "--prob", 
+                                                        help="probability list")] = None,
+    capacity: Annotated[int, Option("-C", help="Bin capacity")] = DEFAULT_RL_CAPACITY,
+    max_items: Annotated[int, Option("--max-items", help="Largest remaining item count")] = 1000,
+    step: Annotated[int, Option(help="Step between remaining item counts")] = 10,
+    opened_states: Annotated[int, Option(help="Demands with items held by opened bins, per count")] = 0,
+    opened_items: Annotated[int, Option(help="Max items held by opened bins")] = 10,
+    finish: Annotated[str, Option(help="Column generation finish, mip or round")] = 'mip',
+    workers: Annotated[Optional[int], Option("-j", "--workers", help="Number of processes")] = None,
+    seed: Annotated[int, Option("-s", "--seed", help="seed")] = 42,
+):
+    """Solve plans for a grid of remaining item counts, for CGReplan to look up
+    """
+    if item_range:
+        items = list(range(item_range[0], item_range[1]))
+    if not items:
+        items = DEFAULT_RL_TRAIN_ITEMS
+
+    distribution = generate_discrete_dist(items, distribution_choice, probs=probs)
+    demands = demand_grid(items, [distribution.p(i) for i in items], range(step, max_items + 1, step),
+                            opened_states, opened_items, seed)
+    print(f"Solving {len(demands)} demand vectors")
+    table = PlanTable.build(capacity, items, demands, {"finish": finish}, workers)
+    table.save(output)
+    print(f"Saved {len(table)} plans with {len(table.patterns)} patterns to {output}")
+
+
 @exp_app.command("problem")
 def experiment_problem(
         experiment_dir: Annotated[Path, Argument(help="experiment directory")] = "experiment/",
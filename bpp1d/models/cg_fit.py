@@ -3,24 +3,43 @@ from bpp1d.structure.bpp_bin import BinWithPattern
 
 from bpp1d.structure.bpp_plan import BinPlanExecutor
 from .model import Model, ModelStatus
-# from .mip.column_generation import ColumnGeneration
-from .mip.column_generation_scipy import CGScipy
+from .mip.enumeration import generate_column_generation
+from .mip.column_generation import MipSolverStatus
+from .mip.plan_cache import PlanCache
 from bpp1d.structure import BppPlan, Solution, BinSolution
-from bpp1d.utils.heuristic_choice import best_fit_choice
+from bpp1d.utils.heuristic_choice import BestFitChoice
 
 
 class CGFit(Model):
 
     def __init__(self, capacity: int, instance: Sequence[int], 
-                    demands: Dict[int, int], name='cg_fit'):
+                    demands: Dict[int, int], name='cg_fit', cg_options: Dict | None = None,
+                    plan_cache: PlanCache | None = None):
         super().__init__(capacity, instance, name)
         self.demands = demands
+        # keyword arguments of ColumnGeneration, e.g. the master backend
+        self.cg_options = cg_options if cg_options is not None else {}
         self.bins: List[BinWithPattern] = []
+        self.cg_info: Dict[str, Any] = {}
+        self.plan_cache = plan_cache
 
-    def build(self) -> Any:
-        # cg = ColumnGeneration(self.capacity, self.demands)
-        cg = CGScipy(self.capacity, self.demands)
+    def _column_generation(self) -> Dict | None:
+        key = PlanCache.key(self.capacity, self.demands, self.cg_options)
+        if self.plan_cache is not None:
+            result = self.plan_cache.get(key)
+            self.cg_info["plan_cache_hits"] = int(result is not None)
+            self.cg_info["plan_cache_misses"] = int(result is None)
+            if result is not None:
+                return result
+        cg = generate_column_generation(self.capacity, self.demands, **self.cg_options)
         result = cg.solve()
+        self.cg_info.update(cg.info)
+        if result is not None and self.plan_cache is not None and cg.status == MipSolverStatus.FINISHED:
+            self.plan_cache.put(key, result)
+        return result
+
+    def build(self) -> Any:
+        result = self._column_generation()
         if result is not None:
             self.plan = BppPlan(result, self.capacity)
         else:
@@ -30,13 +49,15 @@ class CGFit(Model):
     def solve(self)  -> Tuple[Solution, Dict | None]:
         assert self.plan is not None
         self.plan_executor = BinPlanExecutor(self.plan, self.capacity, self.bins, shall_rebalance=False)
+        # indexed best fit for items off the plan, told of slot packs by the executor
+        fallback = BestFitChoice()
         self.status = ModelStatus.SOLVING
         for i, item in enumerate(self.instance):
             # if i / len(self.instance) > 0.9:
-            #     self.plan_executor.heuristic_put(item, best_fit_choice)
+            #     self.plan_executor.heuristic_put(item, fallback)
             # else:
-            self.plan_executor.put(item, best_fit_choice)
+            self.plan_executor.put(item, fallback)
         
         self.status = ModelStatus.FINISHED
 
-        return BinSolution(self.capacity, self.bins), {} #{"plan": self.plan}
+        return BinSolution(self.capacity, self.bins), dict(self.cg_info) #{"plan": self.plan}
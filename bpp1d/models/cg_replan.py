@@ -1,24 +1,65 @@
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
+import time
 from typing import Any, Dict, List, Sequence, Tuple
-# from bpp1d.models.mip.column_generation import ColumnGeneration
-from bpp1d.models.mip.column_generation_scipy import CGScipy
+import numpy as np
+from bpp1d.models.mip.column_generation import MipSolverStatus
+from bpp1d.models.mip.enumeration import generate_column_generation
+from bpp1d.models.mip.column_pool import ColumnPool
+from bpp1d.models.mip.delta import restricted_plan
+from bpp1d.models.mip.plan_cache import PlanCache
+from bpp1d.models.mip.plan_table import PlanTable
+from bpp1d.models.mip.rounding import scale_plan
 from bpp1d.models.model import Model, ModelStatus
+from bpp1d.structure import BinPattern
 from bpp1d.structure.bin_solution import BinSolution
 from bpp1d.structure.bpp_bin import BinWithPattern
 from bpp1d.structure.bpp_plan import BinPlanExecutor, BppPlan, OutOfPlanException
 from bpp1d.structure.solution import Solution
-from bpp1d.utils.heuristic_choice import best_fit_choice
+from bpp1d.utils.heuristic_choice import BestFitChoice
 from bpp1d.utils.demand_estimator import generate_discrete_demand_estimator
 from bpp3d_dataset.utils.distributions import Discrete
 
 
+# plan, solver status, solver info and the updated column pool
+PlanResult = Tuple[Dict | None, MipSolverStatus, Dict[str, Any], ColumnPool | None]
+
+
+def _solve_plan(capacity: int, demands: Dict[int, int], cg_options: Dict,
+                    column_pool: ColumnPool | None) -> PlanResult:
+    """run column generation without touching the model, so that it can run on a worker thread
+    """
+    cg = generate_column_generation(capacity, demands, column_pool=column_pool, **cg_options)
+    result = cg.solve()
+    return result, cg.status, cg.info, column_pool
+
 
 class CGReplan(Model):
+    """Pack by a column generation plan, replanned whenever an item is out of plan
+
+    With ``async_replan``, column generation of a replan runs on a worker thread,
+    cached or scaled plans are still used at once. Meanwhile items follow the
+    current plan where possible and are otherwise placed by best fit. Once ready,
+    the new plan is reduced to the items still to come and replaces the current
+    one between two items, unless the end heuristic threshold has been passed.
+    """
     def __init__(self, capacity: int, instance: Sequence[int], distribution: Discrete,
                         consider_opened_bins=False, 
                         shall_rebalance = True,
-                        name='cg_replan', end_heuristic_theshold: float =0.1):
+                        name='cg_replan', end_heuristic_theshold: float =0.1,
+                        cg_options: Dict | None = None,
+                        plan_cache: PlanCache | None = None,
+                        scale_tolerance: float | None = None,
+                        column_pool_age: int | None = 5,
+                        async_replan: bool = False,
+                        plan_table: PlanTable | None = None,
+                        plan_table_tolerance: float = 0.05,
+                        delta_gap: float | None = None):
         super().__init__(capacity, instance, name)
+        # keyword arguments of ColumnGeneration, e.g. the master backend
+        self.cg_options = cg_options if cg_options is not None else {}
         self.distribution = distribution
+        self.plan: BppPlan | None = None
         self.history_plan: Dict[int, BppPlan] = {}
         self.history_demands:Dict[int, Dict[int, int]] = {}
         self.bins: List[BinWithPattern] = []
@@ -28,28 +69,124 @@ class CGReplan(Model):
         self.replan_count = 0
         self.end_heuristic_theshold = end_heuristic_theshold
         self.shall_rebalance = shall_rebalance
-        
+        # column generation statistics summed over build and replans
+        self.cg_info: Dict[str, float] = {}
+        self.plan_cache = plan_cache
+        # max L1 distance between the normalised demands of a replan and those of the
+        # last solved plan, for which that plan is scaled instead of solved again
+        self.scale_tolerance = scale_tolerance
+        self._reference: Tuple[Dict[int, int], Dict] | None = None
+        # columns of earlier plans seed each replan, None to start from scratch
+        self.column_pool = ColumnPool(column_pool_age) if column_pool_age is not None else None
+        self.async_replan = async_replan
+        # plans solved offline, queried by the nearest demand vector
+        self.plan_table = plan_table
+        self.plan_table_tolerance = plan_table_tolerance
+        # max relative gap to the lower bound of a replan over the columns at hand,
+        # None to always run column generation
+        self.delta_gap = delta_gap
+
+    def _column_generation(self, demands: Dict[int, int]) -> Dict | None:
+        result = self._lookup_plan(demands)
+        if result is not None:
+            return result
+        return self._record_plan(demands, _solve_plan(self.capacity, demands, self.cg_options, self.column_pool))
+
+    def _lookup_plan(self, demands: Dict[int, int]) -> Dict | None:
+        """plan from the cache, the plan table or by scaling the last solved one,
+        None if it has to be solved
+        """
+        if self.plan_cache is not None:
+            result = self.plan_cache.get(PlanCache.key(self.capacity, demands, self.cg_options))
+            hit = "plan_cache_hits" if result is not None else "plan_cache_misses"
+            self.cg_info[hit] = self.cg_info.get(hit, 0) + 1
+            if result is not None:
+                return result
+        if self.plan_table is not None:
+            result = self.plan_table.nearest(self.capacity, demands, self.plan_table_tolerance)
+            hit = "plan_table_hits" if result is not None else "plan_table_misses"
+            self.cg_info[hit] = self.cg_info.get(hit, 0) + 1
+            if result is not None:
+                return result
+        scaled = self._scale_reference(demands)
+        if scaled is not None:
+            self.cg_info["scaled_plans"] = self.cg_info.get("scaled_plans", 0) + 1
+            return scaled
+        delta = self._delta_plan(demands)
+        if delta is not None:
+            self.cg_info["delta_replans"] = self.cg_info.get("delta_replans", 0) + 1
+        return delta
+
+    def _delta_plan(self, demands: Dict[int, int]) -> Dict | None:
+        """repair the current plan by a master over its patterns and the pooled ones,
+        None if the gap to the lower bound exceeds ``delta_gap``
+        """
+        if self.delta_gap is None or self.plan is None:
+            return None
+        items = list(demands)
+        columns = BinPattern.encode(self.plan.plan_dict, items)
+        if self.column_pool is not None:
+            columns = np.vstack((columns, self.column_pool.columns(items)))
+        plan, lower_bound = restricted_plan(self.capacity, demands, columns,
+                                            master=self.cg_options.get('master', 'highs'))
+        if sum(plan.values()) - lower_bound > self.delta_gap * max(lower_bound, 1):
+            return None
+        return plan
+
+    def _record_plan(self, demands: Dict[int, int], solved: PlanResult) -> Dict | None:
+        """keep the outcome of column generation: cache, reference plan, column pool and statistics
+        """
+        result, status, info, self.column_pool = solved
+        if self.replan_count > 0:
+            self.cg_info["full_replans"] = self.cg_info.get("full_replans", 0) + 1
+        if result is not None:
+            self._reference = (dict(demands), result)
+        if result is not None and self.plan_cache is not None and status == MipSolverStatus.FINISHED:
+            self.plan_cache.put(PlanCache.key(self.capacity, demands, self.cg_options), result)
+        for stat in ("cg_iterations", "cg_columns", "cg_pooled_columns", "cg_time", "cg_pricing_time"):
+            self.cg_info[stat] = self.cg_info.get(stat, 0) + info.get(stat, 0)
+        # plans returned before the LP converged, within time_budget or max_iter
+        self.cg_info["cg_timeouts"] = (self.cg_info.get("cg_timeouts", 0)
+                                        + int(status == MipSolverStatus.TIMEOUT))
+        return result
+
+    def _scale_reference(self, demands: Dict[int, int]) -> Dict | None:
+        """scale the last solved plan if the demands only changed in size, not in direction
+        """
+        if self.scale_tolerance is None or self._reference is None:
+            return None
+        reference, plan = self._reference
+        if reference.keys() != demands.keys():
+            return None
+        old = np.array([reference[i] for i in reference], dtype=float)
+        new = np.array([demands[i] for i in reference], dtype=float)
+        if old.sum() <= 0 or new.sum() <= 0:
+            return None
+        if np.abs(old / old.sum() - new / new.sum()).sum() > self.scale_tolerance:
+            return None
+        return scale_plan(plan, new.sum() / old.sum(), demands, self.capacity)
+
     def build(self) -> Any:
-        # cg = ColumnGeneration(self.capacity, self.demands)
-        cg = CGScipy(self.capacity, self.demands)
-        result = cg.solve()
+        result = self._column_generation(self.demands)
         if result is not None:
             self.plan = BppPlan(result, self.capacity)       
 
         return super().build()
 
 
-    def _replan(self) -> BppPlan | None:
+    def _replan_demands(self) -> Dict[int, int]:
         self.replan_count += 1
         # print(f"replanning, count{self.replan_count}" )
-        self.demands = self.estimator(self.distribution, self.remain_count, 
-                                    [b for b in self.bins if not b.full])
-        # cg = ColumnGeneration(self.capacity, self.demands)
+        demands = self.estimator.estimate(self.distribution, self.remain_count,
+                                            self.plan_executor.unplanned_items)
         for i, d in self.plan_executor.extra_demands.items():
-            self.demands[i] = max(self.demands.get(i, 0), d)
+            demands[i] = max(demands.get(i, 0), d)
         self.plan_executor.extra_demands = {}
-        cg = CGScipy(self.capacity, self.demands)
-        result = cg.solve()
+        return demands
+
+    def _replan(self) -> BppPlan | None:
+        self.demands = self._replan_demands()
+        result = self._column_generation(self.demands)
 
         # print("replan finished")
         if result is not None:
@@ -58,13 +195,40 @@ class CGReplan(Model):
             return None
         
 
-    def _check_plan(self):
+    def _check_plan(self, bins: Sequence[BinWithPattern] | None = None):
         # only run after trigger replan with considering the opened bins
-        opened_bins = [b for b in self.bins if not b.full]
+        assert self.plan is not None
+        opened_bins = [b for b in (bins if bins is not None else self.bins) if not b.full]
         for b in opened_bins:
             if b.pattern in self.plan and self.plan[b.pattern] > 1:
                 self.plan[b.pattern] -= 1
-    
+
+    def _swap_plan(self, i: int, result: Dict | None, demands: Dict[int, int], since: int) -> None:
+        """Replace the plan by the one of a background replan
+
+        Args:
+            i (int): index of the next item
+            result (Dict | None): plan of the replan, kept as is if None
+            demands (Dict[int, int]): demands the replan was solved for
+            since (int): index of the item when the replan started
+        """
+        if result is None:
+            return
+        assert self.plan is not None
+        if i > since:
+            # items placed while planning were counted as remaining: take them off the
+            # demands and shrink the plan to the items left
+            placed = Counter(self.instance[since:i])
+            demands = {size: max(d - placed.get(size, 0), 0) for size, d in demands.items()}
+            result = scale_plan(result, (len(self.instance) - i) / (len(self.instance) - since),
+                                demands, self.capacity)
+        self.history_plan[i] = self.plan.copy()
+        self.history_demands[i] = demands.copy()
+        self.demands = demands
+        self.plan = BppPlan(result, self.capacity)
+        if self.consider_opened_bins:
+            self._check_plan()
+        self.plan_executor.plan = self.plan
 
 
 
@@ -74,34 +238,71 @@ class CGReplan(Model):
         self.plan_executor = BinPlanExecutor(self.plan, self.capacity, self.bins, shall_rebalance= self.shall_rebalance)
         self.remain_count = len(self.instance)
         self.status = ModelStatus.SOLVING
+        latencies = np.zeros(len(self.instance))
+        worker = ThreadPoolExecutor(max_workers=1) if self.async_replan else None
+        # indexed best fit for items off the plan, told of slot packs by the executor
+        fallback = BestFitChoice()
+        # background replan: its future, demands and the index of the item when it started
+        pending: Tuple[Future, Dict[int, int], int] | None = None
         for i, item in enumerate(self.instance):
             # print(f'step {i}')
+            start = time.perf_counter()
+            if pending is not None and pending[0].done():
+                future, demands, since = pending
+                result = self._record_plan(demands, future.result())
+                # as for a synchronous replan, plans ready past the end heuristic threshold are not used
+                if 1 - i / len(self.instance) >= self.end_heuristic_theshold:
+                    self._swap_plan(i, result, demands, since)
+                pending = None
 
             try:
-                self.plan_executor.put(item, None)
+                self.plan_executor.put(item, None if pending is None else fallback)
 
             except OutOfPlanException:
 
-                result = self._replan()
-                if (result is None
-                    or 1 - i / len(self.instance) < self.end_heuristic_theshold):
-                    self.plan_executor.put(item, best_fit_choice)
+                if worker is not None:
+                    if 1 - i / len(self.instance) >= self.end_heuristic_theshold:
+                        demands = self._replan_demands()
+                        result = self._lookup_plan(demands)
+                        if result is not None:
+                            self._swap_plan(i, result, demands, i)
+                        else:
+                            pending = (worker.submit(_solve_plan, self.capacity, demands, self.cg_options,
+                                                        self.column_pool), demands, i)
+                    self.plan_executor.put(item, fallback)
                 else:
-                    # record new plan
-                    self.history_plan[i] = self.plan.copy()
-                    self.history_demands[i] = self.demands.copy()
-
-                    # self.plan = BppPlan(result, self.capacity)
-                    # print(self.demands)
-                    self.plan = result
-                    if self.consider_opened_bins:
-                        self._check_plan()
-                    self.plan_executor.plan = self.plan
-                    self.plan_executor.put(item, None)
+                    new_plan = self._replan()
+                    if (new_plan is None
+                        or 1 - i / len(self.instance) < self.end_heuristic_theshold):
+                        self.plan_executor.put(item, fallback)
+                    else:
+                        # record new plan
+                        self.history_plan[i] = self.plan.copy()
+                        self.history_demands[i] = self.demands.copy()
+
+                        # self.plan = BppPlan(result, self.capacity)
+                        # print(self.demands)
+                        self.plan = new_plan
+                        if self.consider_opened_bins:
+                            self._check_plan()
+                        self.plan_executor.plan = self.plan
+                        self.plan_executor.put(item, None)
 
             self.remain_count -= 1
+            latencies[i] = time.perf_counter() - start
 
+        if worker is not None:
+            if pending is not None:
+                # the last replan still counts in the statistics
+                self._record_plan(pending[1], pending[0].result())
+            worker.shutdown(wait=True)
         self.status = ModelStatus.FINISHED
 
-        return BinSolution(self.capacity, self.bins), {"replan_count": self.replan_count}
+        return BinSolution(self.capacity, self.bins), {
+            "replan_count": self.replan_count,
+            **self.cg_info,
+            "latency_p50": float(np.percentile(latencies, 50)) if len(latencies) else 0.,
+            "latency_p99": float(np.percentile(latencies, 99)) if len(latencies) else 0.,
+            "latency_max": float(latencies.max()) if len(latencies) else 0.,
+        }
 
@@ -1,16 +1,19 @@
 from typing import Any, Dict, List, Sequence, Tuple
-from bpp1d.structure import BinSolution, BppBin, Solution
-from bpp1d.utils.heuristic_choice import HeuristicChoiceFn, best_fit_choice
+import numpy as np
+from bpp1d.structure import BinSolution, BinStore, BppBin, LevelHistogram, Solution
+from bpp1d.utils.heuristic_choice import HeuristicChoiceFn, LevelChoiceFn, BestFitChoice, best_fit_level
 from .model import Model, ModelStatus
 
 class HeuristicModel(Model):
 
 
     def __init__(self, capacity: int, instance: Sequence[int], name: str = 'model',
-                    choice_fn: HeuristicChoiceFn | None = None, offline_desc=False, *args, **kwargs):
+                    choice_fn: HeuristicChoiceFn | None = None, offline_desc=False, 
+                    bin_store: bool = False, *args, **kwargs):
         super().__init__(capacity, instance, name)
-        self.choice_fn = choice_fn if choice_fn is not None else best_fit_choice
-        self.bins: List[BppBin] = []
+        self.choice_fn = choice_fn if choice_fn is not None else BestFitChoice()
+        # array backed storage avoids one object per bin on long instances
+        self.bins: List[BppBin] | BinStore = BinStore(capacity) if bin_store else []
         self.offline_desc = offline_desc
 
     def solve(self) -> Tuple[Solution, Dict | None]:
@@ -21,7 +24,12 @@ class HeuristicModel(Model):
 
         for item in self.instance:
             choice = self.choice_fn(item, self.bins)
-            if choice < 0:
+            if isinstance(self.bins, BinStore):
+                if choice < 0:
+                    self.bins.open([item])
+                else:
+                    self.bins.pack(choice, item)
+            elif choice < 0:
                 self.bins.append(BppBin(self.capacity, [item]))
             else:
                 self.bins[choice].pack(item)
@@ -30,11 +38,39 @@ class HeuristicModel(Model):
         return BinSolution(self.capacity, self.bins), None
 
 
+class LevelHeuristicModel(Model):
+    """Heuristics that only depend on bin levels, run on a ``LevelHistogram``
+
+    Memory does not grow with the number of open bins and the solution is a
+    ``PotentialSolution``. Choices are only recorded if ``record_choices`` is set.
+    """
+
+    def __init__(self, capacity: int, instance: Sequence[int], name: str = 'model',
+                    choice_fn: LevelChoiceFn | None = None, record_choices: bool = False, *args, **kwargs):
+        super().__init__(capacity, instance, name)
+        self.choice_fn = choice_fn if choice_fn is not None else best_fit_level
+        self.record_choices = record_choices
+        self.levels = LevelHistogram(capacity)
+
+    def solve(self) -> Tuple[Solution, Dict | None]:
+        self.status = ModelStatus.SOLVING
+        choices = []
+        for item in self.instance:
+            level = self.choice_fn(item, self.levels)
+            self.levels.pack(item, level)
+            if self.record_choices:
+                choices.append([item, level])
+
+        self.status = ModelStatus.FINISHED
+        return self.levels.to_solution(choices), None
+
+
 class HarmonicKModel(HeuristicModel):
-    def __init__(self, capacity: int, instance: Sequence[int], name: str = 'hamonic-k', K: int = 20):
-        super().__init__(capacity, instance, name, None)
-        # self.bin_types = []
-        self.bin_with_types: List[Tuple[BppBin, int]] = []
+    def __init__(self, capacity: int, instance: Sequence[int], name: str = 'hamonic-k', K: int = 20,
+                    bin_store: bool = False):
+        super().__init__(capacity, instance, name, None, bin_store=bin_store)
+        # harmonic class of each bin, kept as the store tags when using a BinStore
+        self.bin_types: List[int] = []
 
         self.K = K
 
@@ -52,19 +88,28 @@ class HarmonicKModel(HeuristicModel):
                 break
         return i_type
 
-    def find_with_type(self, item: int, target_type: int):
-        for bin, bin_type in self.bin_with_types:
+    def find_with_type(self, item: int, target_type: int) -> int:
+        """Return the first bin of ``target_type`` that can hold the item, -1 if none
+        """
+        if isinstance(self.bins, BinStore):
+            candidates = (self.bins.residuals >= item) & (self.bins.tags == target_type)
+            if target_type != self.K:
+                candidates &= self.bins.counts < target_type
+            choice = int(np.argmax(candidates)) if len(candidates) else -1
+            return choice if choice >= 0 and candidates[choice] else -1
+
+        for idx, (bin, bin_type) in enumerate(zip(self.bins, self.bin_types)):
             if bin.empty_space < item:
                 continue
 
             if target_type == self.K:
                 if bin_type == self.K:
-                    return bin
+                    return idx
             elif target_type == bin_type:
                 if len(bin) < target_type:
-                    return bin
+                    return idx
 
-        return None
+        return -1
 
     def solve(self) -> Tuple[Solution, Dict | None]:
         for item in self.instance:
@@ -81,11 +126,14 @@ class HarmonicKModel(HeuristicModel):
             #         b.pack(item)
                     # self.bin_types.append(i_type)
                     # break
-            if not candidate_bin:
-                self.bin_with_types.append((BppBin(self.capacity, [item]), i_type))
+            if candidate_bin < 0:
+                if isinstance(self.bins, BinStore):
+                    self.bins.open([item], tag=i_type)
+                else:
+                    self.bins.append(BppBin(self.capacity, [item]))
+                    self.bin_types.append(i_type)
             else:
-                candidate_bin.pack(item)
-        self.bins = [b[0] for b in self.bin_with_types]
+                self.bins[candidate_bin].pack(item)
         self.status = ModelStatus.FINISHED
 
         return BinSolution(self.capacity, self.bins), {}
@@ -1,6 +1,17 @@
-from .column_generation import ColumnGeneration, MipSolverStatus
+from .column_generation import ColumnGeneration, MipSolverStatus, CG_OPTIONS
+from .enumeration import PatternEnumeration, generate_column_generation
+from .master import MasterBackend, MASTER_BACKENDS
+from .plan_cache import PlanCache
+from .plan_table import PlanTable
 
 __all__ = [
     "ColumnGeneration",
-    "MipSolverStatus"
-]
\ No newline at end of file
+    "MipSolverStatus",
+    "CG_OPTIONS",
+    "PatternEnumeration",
+    "generate_column_generation",
+    "MasterBackend",
+    "MASTER_BACKENDS",
+    "PlanCache",
+    "PlanTable",
+]
@@ -1,29 +1,82 @@
-from typing import Dict, List
-from pulp import LpVariable, lpSum, LpProblem, LpAffineExpression
-from pulp import LpMaximize, LpMinimize, LpInteger, LpContinuous, PULP_CBC_CMD
+from typing import Any, Dict, List, Tuple
+import time
+from pulp import LpVariable, lpSum, LpProblem
+from pulp import LpMaximize, LpInteger, PULP_CBC_CMD
 # import pulp2mat
 import numpy as np
 # from scipy.optimize import milp
 from enum import Enum
-from itertools import chain
 
 from bpp1d.structure import BinPattern
+from .pricing import knapsack_columns
+from .column_pool import ColumnPool
+from .master import IncrementalMaster, generate_master
+from .rounding import round_down
 
 class MipSolverStatus(Enum):
     FINISHED = 0
     UNFINISHED = 1
     TIMEOUT = 2
 
+PRICING_METHODS = ['dp', 'cbc']
+FINISH_METHODS = ['mip', 'round']
+# keys of a model configuration forwarded to generate_column_generation
+CG_OPTIONS = ['pricing', 'bounded', 'master', 'sparse_master', 'max_columns',
+                'finish', 'finish_gap', 'mip_time_limit', 'time_budget', 'enumeration_limit']
+
+
 class ColumnGeneration:
     """Column generation of cutting stock problem
+
+    The pricing subproblem is an integer knapsack over the duals, solved either by
+    dynamic programming (``pricing='dp'``) or as an integer program through
+    PuLP/CBC (``pricing='cbc'``). With ``bounded``, the DP caps each item count of
+    a new pattern by its demand. DP pricing adds up to ``max_columns`` distinct
+    patterns with negative reduced cost per round, CBC pricing adds one.
+    The master problem is solved by the backend named
+    ``master``, see ``MASTER_BACKENDS``. It persists across iterations, new columns
+    are appended to it and, when the backend supports it, it is re-optimised from
+    the previous basis.
+
+    Once the LP converges, ``finish='mip'`` solves the master as an integer program
+    over all columns. ``finish='round'`` rounds the LP solution down and packs the
+    uncovered demand by first fit decreasing, the integer program (limited to
+    ``mip_time_limit`` seconds) then only runs if the relative gap of the rounded
+    plan to the LP bound exceeds ``finish_gap``. With ``time_budget``, pricing stops
+    once the budget is spent and the integer program gets what is left of it.
+    A ``column_pool`` seeds the master with columns of earlier runs and receives
+    the columns of this one.
     """
 
-    def __init__(self, capacity: int, demands: Dict[int, int], verbose: int=0):
+    def __init__(self, capacity: int, demands: Dict[int, int], verbose: int=0,
+                    pricing: str = 'dp', bounded: bool = False, master: str = 'highs',
+                    sparse_master: bool = False, max_columns: int = 1,
+                    finish: str = 'mip', finish_gap: float | None = None,
+                    mip_time_limit: float | None = None, time_budget: float | None = None,
+                    column_pool: ColumnPool | None = None):
+        if pricing not in PRICING_METHODS:
+            raise ValueError(f"Pricing method should be one of {PRICING_METHODS}, got {pricing}")
+        if finish not in FINISH_METHODS:
+            raise ValueError(f"Finish method should be one of {FINISH_METHODS}, got {finish}")
         self.capacity = capacity
         self.demands = demands
         self.num_items = len(demands)
         self.status: MipSolverStatus = MipSolverStatus.UNFINISHED
         self.verbose = verbose
+        self.pricing = pricing
+        self.bounded = bounded
+        self.master = generate_master(master)
+        self.sparse_master = sparse_master
+        if max_columns < 1:
+            raise ValueError(f"max_columns should be positive, got {max_columns}")
+        self.max_columns = max_columns
+        self.finish = finish
+        self.finish_gap = finish_gap
+        self.mip_time_limit = mip_time_limit
+        self.time_budget = time_budget
+        self.column_pool = column_pool
+        # statistics of the last solve
+        self.info: Dict[str, Any] = {}
         # initalize patterns
 
     @property
@@ -39,85 +92,172 @@ class ColumnGeneration:
         problem.solve(PULP_CBC_CMD(msg = False, mip=not relax))
         
     def solve(self, max_iter: int=100) -> Dict[BinPattern, int] | None:
+        """Run column generation
+
+        If ``max_iter`` or ``time_budget`` is reached before the LP converges, the
+        status is ``TIMEOUT`` and the plan comes from the last LP solution, so a
+        plan is returned either way. ``info`` reports the Farley lower bound
+        ``cg_lower_bound`` and the relative gap ``cg_gap`` of the plan to it.
+
+        Args:
+            max_iter (int, optional): max number of pricing rounds. Defaults to 100.
+
+        Returns:
+            Dict[BinPattern, int] | None: number of bins of each pattern
+        """
 
         patterns = np.zeros((len(self.demands), len(self.demands)), dtype=np.int64)
         for i, item in enumerate(self.demands):
             patterns[i, i] = self.capacity // item
             # patterns[i, i] = 1
-        
-        master_prob, x, dual = self._solve_master(patterns)
 
-        for _ in range(max_iter):
+        start = time.perf_counter()
+        self.status = MipSolverStatus.UNFINISHED
+        pricing_time = 0.
+        demands = np.array([self.demands[item] for item in self.items])
+        master = self.master.incremental(demands, self.sparse_master)
+        master.add_columns(patterns)
+        known = {tuple(pattern) for pattern in patterns}
+        pooled = 0
+        if self.column_pool is not None:
+            seeds = [tuple(c) for c in self.column_pool.columns(list(self.items)) if tuple(c) not in known]
+            if seeds:
+                master.add_columns(np.array(seeds))
+                known.update(seeds)
+                pooled = len(seeds)
+        objective, x, dual = master.solve()
+        lower_bound = 0.
+
+        iteration = 0
+        for iteration in range(1, max_iter + 1):
 
             assert dual is not None
-            dual_prob, delta = self._solve_dual(dual)
-            new_pattern = np.array([delta[i].value() for i in range(self.num_items)])
-            # print(new_pattern, dual_prob.objective.value())
-            patterns = np.vstack((patterns, new_pattern))
+            pricing_start = time.perf_counter()
+            columns = self._price_columns(dual)
+            pricing_time += time.perf_counter() - pricing_start
+            price = columns[0][0]
+            # Farley bound: no pattern is worth more than price under these duals
+            lower_bound = max(lower_bound, objective / max(price, 1))
+            new_patterns = []
+            for value, pattern in columns:
+                key = tuple(np.round(pattern).astype(np.int64))
+                if value > 1 + 10e-7 and key not in known:
+                    known.add(key)
+                    new_patterns.append(key)
+
+            if price <= 1 + 10e-7 or not new_patterns:
+                self.status = MipSolverStatus.FINISHED
+                break
+
+            master.add_columns(np.array(new_patterns))
+            objective, x, dual = master.solve()
 
-            master_prob, x, dual = self._solve_master(patterns)
-            
             if self.verbose > 0:
-                print(master_prob.objective.values())
+                print(objective)
 
-            if dual_prob.objective.value() <= 1 + 10e-7:
-                self.status = MipSolverStatus.FINISHED
+            if self.time_budget is not None and time.perf_counter() - start >= self.time_budget:
                 break
-        
+
         if self.status != MipSolverStatus.FINISHED:
             self.status = MipSolverStatus.TIMEOUT
-            return None
-        else:
-            master_prob, x, _ = self._solve_master(patterns, relax=False)
-            # master_prob, x, _ = self._solve_master(patterns, relax=True)
-            plan = {
-                self._decode_pattern(patterns[i]): x[i].value()
-                for i in range(patterns.shape[0])
-                if x[i].value() > 0
-            }
-            return plan
-
+        if self.column_pool is not None:
+            self.column_pool.update(master.patterns, x, list(self.items))
+        lower_bound = float(np.ceil(lower_bound - 1e-6))
+        self.info = {
+            "cg_iterations": iteration,
+            "cg_columns": master.num_columns,
+            "cg_pooled_columns": pooled,
+            "cg_lp_objective": objective,
+            "cg_lower_bound": lower_bound,
+            "cg_pricing_time": pricing_time,
+        }
+        return self._plan(master, x, lower_bound, start)
+
+    def _plan(self, master: IncrementalMaster, x: np.ndarray, lower_bound: float,
+                start: float) -> Dict[BinPattern, int]:
+        """Finish the last master solution into a plan and record its gap
+
+        Args:
+            master (IncrementalMaster): master problem with all columns
+            x (np.ndarray): LP usage of each pattern
+            lower_bound (float): lower bound of the number of bins
+            start (float): ``time.perf_counter()`` when the solve started
+
+        Returns:
+            Dict[BinPattern, int]: number of bins of each pattern
+        """
+        time_limit = self.mip_time_limit
+        if self.time_budget is not None:
+            remaining = self.time_budget - (time.perf_counter() - start)
+            time_limit = remaining if time_limit is None else min(time_limit, remaining)
+        patterns, x = self._finish(master, x, lower_bound, time_limit)
+        plan: Dict[BinPattern, int] = {}
+        for i in range(patterns.shape[0]):
+            if round(x[i]) > 0:
+                # rounding may add a pattern that is already a column
+                pattern = self._decode_pattern(patterns[i])
+                plan[pattern] = plan.get(pattern, 0) + int(round(x[i]))
+
+        num_bins = sum(plan.values())
+        self.info["cg_bins"] = num_bins
+        self.info["cg_gap"] = (num_bins - lower_bound) / max(lower_bound, 1)
+        self.info["cg_time"] = time.perf_counter() - start
+        return plan
+
+    def _finish(self, master: IncrementalMaster, x: np.ndarray, lower_bound: float,
+                    time_limit: float | None) -> Tuple[np.ndarray, np.ndarray]:
+        """Integer plan from the last master problem
+
+        The LP solution rounded down and repaired is always available, the
+        integer program replaces it if it is run and finds a better plan in time.
+
+        Args:
+            master (IncrementalMaster): master problem with all columns
+            x (np.ndarray): LP usage of each pattern
+            lower_bound (float): lower bound of the number of bins
+            time_limit (float | None): seconds left for the integer program
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: pattern matrix and integer usage of each pattern
+        """
+        patterns, usage = round_down(master.patterns, x, master.demands, list(self.items), self.capacity)
+        gap = (usage.sum() - lower_bound) / max(lower_bound, 1)
+        self.info["cg_rounding_gap"] = gap
+        self.info["cg_finish"] = 'round'
+        if self.finish == 'round' and (self.finish_gap is None or gap <= self.finish_gap):
+            return patterns, usage
+        if usage.sum() <= lower_bound or (time_limit is not None and time_limit <= 0):
+            return patterns, usage
+        try:
+            mip_objective, mip_x, _ = master.solve(relax=False, time_limit=time_limit)
+        except ValueError:
+            # time limit reached without an integer solution
+            return patterns, usage
+        if mip_objective >= usage.sum():
+            return patterns, usage
+        self.info["cg_finish"] = 'mip'
+        return master.patterns, mip_x
 
     def _decode_pattern(self, pattern: np.ndarray):
-        items = [[item] * int(num) for num, item in zip(pattern, self.items)]
-        return BinPattern(chain(*items))
+        return BinPattern.from_counts(np.round(pattern), list(self.items))
 
 
 
-    def _solve_master(self, patterns: np.ndarray, relax: bool = True):
-        master_prob = LpProblem("MainProblem", LpMinimize)
-        vartype = LpContinuous if relax else LpInteger
-        num_patterns = patterns.shape[0]
-        # print(patterns)
-        # variables
-        x = {
-            j: LpVariable(f"x_{j}", lowBound=0, upBound=None, cat=vartype) 
-            for j in range(num_patterns)
-        }
-
-        constraints: List[LpAffineExpression] = []
-        # constraint
-        for j, item in enumerate(self.items):
-            c =  lpSum(patterns[i, j] * x[i] 
-                        for i in range(num_patterns)) >= self.demands[item]
-            constraints.append(c)
-            master_prob += c
-
+    def _price_columns(self, duals) -> List[Tuple[float, np.ndarray]]:
+        """Solve the pricing subproblem for up to ``max_columns`` patterns
 
-        # object
-        master_prob += lpSum(x[i] for i in range(num_patterns))
-
-        self._call_solver(master_prob, relax)
-        duals = None
-        if relax:
-            duals = [c.pi for _, c in master_prob.constraints.items()]
-        # for i in range(num_patterns):
-        #     print(x[i].value(), patterns[i])
-        
-        # print([(v, v.value()) for v in x.values()])
-        
-        return master_prob, x, duals
+        Args:
+            duals: dual value of each demand constraint
 
+        Returns:
+            List[Tuple[float, np.ndarray]]: total dual value and pattern of each column, best first
+        """
+        if self.pricing == 'dp':
+            bounds = list(self.demands.values()) if self.bounded else None
+            return knapsack_columns(duals, list(self.items), self.capacity, self.max_columns, bounds)
+        else:
+            dual_prob, delta = self._solve_dual(duals)
+            return [(dual_prob.objective.value(), np.array([delta[i].value() for i in range(self.num_items)]))]
         
     def _solve_dual(self, duals):
         
@@ -0,0 +1,54 @@
+from typing import Dict, Sequence
+import numpy as np
+
+from bpp1d.structure import BinPattern
+
+
+class ColumnPool:
+    """Columns of earlier column generation runs, to seed the master of later ones
+
+    After each run, columns used by the LP solution are kept with age 0 and the
+    others age by one. Columns older than ``max_age`` are pruned, so the pool
+    follows the patterns that recent plans actually use.
+    """
+
+    def __init__(self, max_age: int = 5) -> None:
+        self.max_age = max_age
+        self._ages: Dict[BinPattern, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._ages)
+
+    def columns(self, items: Sequence[int]) -> np.ndarray:
+        """Pattern matrix of the pooled columns made of the given items only
+
+        Args:
+            items (Sequence[int]): item size of each column of the matrix
+
+        Returns:
+            np.ndarray: pattern matrix, one row per pattern
+        """
+        sizes = set(items)
+        return BinPattern.encode([p for p in self._ages if sizes.issuperset(p.sizes)], items)
+
+    def update(self, patterns: np.ndarray, x: np.ndarray, items: Sequence[int]) -> None:
+        """Add the columns of a run and age the unused ones
+
+        Args:
+            patterns (np.ndarray): pattern matrix of the master, one row per pattern
+            x (np.ndarray): LP usage of each pattern
+            items (Sequence[int]): item size of each column of the matrix
+        """
+        used = set()
+        for counts, value in zip(patterns, x):
+            pattern = BinPattern.from_counts(counts, items)
+            if value > 1e-9:
+                used.add(pattern)
+            self._ages.setdefault(pattern, 0)
+        for pattern in list(self._ages):
+            if pattern in used:
+                self._ages[pattern] = 0
+            else:
+                self._ages[pattern] += 1
+                if self._ages[pattern] > self.max_age:
+                    del self._ages[pattern]
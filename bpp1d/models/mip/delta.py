@@ -0,0 +1,55 @@
+from typing import Dict, Tuple
+import math
+
+import numpy as np
+
+from bpp1d.structure import BinPattern
+from .master import generate_master
+from .pricing import knapsack_columns
+from .rounding import round_down, to_plan
+
+
+def restricted_plan(capacity: int, demands: Dict[int, int], columns: np.ndarray, rounds: int = 3,
+                        max_columns: int = 5, master: str = 'highs') -> Tuple[Dict[BinPattern, int], float]:
+    """Plan from a master problem over known columns and a few priced ones
+
+    The single item size patterns are added so the master is always feasible.
+    At most ``rounds`` pricing rounds add up to ``max_columns`` columns each, and
+    every knapsack over the duals also gives a Farley lower bound of the full
+    problem, to judge whether the plan is good enough.
+
+    Args:
+        capacity (int): bin capacity
+        demands (Dict[int, int]): demand of each item
+        columns (np.ndarray): known patterns, one row each, columns in ``demands`` order
+        rounds (int, optional): max pricing rounds. Defaults to 3.
+        max_columns (int, optional): max columns added per round. Defaults to 5.
+        master (str, optional): master backend, see ``MASTER_BACKENDS``. Defaults to 'highs'.
+
+    Returns:
+        Tuple[Dict[BinPattern, int], float]: plan covering the demands and lower bound of its number of bins
+    """
+    items = list(demands)
+    demand = np.array([demands[i] for i in items])
+    problem = generate_master(master).incremental(demand)
+    problem.add_columns(np.diag([capacity // i for i in items]))
+    known = {tuple(c) for c in problem.patterns}
+    unknown = [tuple(c) for c in np.asarray(columns).reshape(-1, len(items)) if tuple(c) not in known]
+    if unknown:
+        problem.add_columns(np.array(unknown))
+        known.update(unknown)
+
+    lower_bound = 0.
+    for pricing_round in range(rounds + 1):
+        objective, x, duals = problem.solve()
+        assert duals is not None
+        priced = knapsack_columns(duals.tolist(), items, capacity, max_columns)
+        lower_bound = max(lower_bound, objective / max(priced[0][0], 1))
+        new_columns = [tuple(c) for value, c in priced if value > 1 + 1e-6 and tuple(c) not in known]
+        if pricing_round == rounds or not new_columns:
+            break
+        problem.add_columns(np.array(new_columns))
+        known.update(new_columns)
+
+    patterns, usage = round_down(problem.patterns, x, demand, items, capacity)
+    return to_plan(patterns, usage, items), float(math.ceil(lower_bound - 1e-6))
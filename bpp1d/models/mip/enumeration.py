@@ -0,0 +1,107 @@
+from functools import lru_cache
+import time
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from bpp1d.structure import BinPattern
+from .column_generation import ColumnGeneration, MipSolverStatus
+
+# max number of maximal patterns for which the master is solved over all of them
+ENUMERATION_LIMIT = 2000
+
+
+def maximal_patterns(capacity: int, items: Sequence[int], limit: int | None = None) -> np.ndarray | None:
+    """All maximal feasible patterns, i.e. those where no other item fits
+
+    Results are cached per ``(capacity, items, limit)`` and returned read only.
+
+    Args:
+        capacity (int): bin capacity
+        items (Sequence[int]): distinct item sizes, the column order of the result
+        limit (int | None, optional): give up beyond this number of patterns. Defaults to None.
+
+    Returns:
+        np.ndarray | None: pattern matrix, one row per pattern, or None if over the limit
+    """
+    return _maximal_patterns(capacity, tuple(int(i) for i in items), limit)
+
+
+@lru_cache(maxsize=128)
+def _maximal_patterns(capacity: int, items: Tuple[int, ...], limit: int | None) -> np.ndarray | None:
+    order = sorted(range(len(items)), key=lambda i: -items[i])
+    sizes = [items[i] for i in order]
+    if not sizes:
+        return np.zeros((0, 0), dtype=np.int64)
+    patterns: List[List[int]] = []
+    counts = [0] * len(sizes)
+
+    def extend(k: int, space: int) -> bool:
+        if k == len(sizes) - 1:
+            # filling the smallest item to the top leaves no room for any item,
+            # so each branch ends in exactly one maximal pattern
+            counts[k] = space // sizes[k]
+            patterns.append(counts.copy())
+            return limit is None or len(patterns) <= limit
+        for c in range(space // sizes[k], -1, -1):
+            counts[k] = c
+            if not extend(k + 1, space - c * sizes[k]):
+                return False
+        counts[k] = 0
+        return True
+
+    if not extend(0, capacity):
+        return None
+    arr = np.zeros((len(patterns), len(items)), dtype=np.int64)
+    arr[:, order] = np.array(patterns, dtype=np.int64)
+    arr.setflags(write=False)
+    return arr
+
+
+class PatternEnumeration(ColumnGeneration):
+    """Master problem over all maximal patterns, no pricing is needed
+
+    Accepts the options of ``ColumnGeneration``, pricing ones are ignored.
+    """
+
+    def __init__(self, capacity: int, demands: Dict[int, int], patterns: np.ndarray, **kwargs):
+        super().__init__(capacity, demands, **kwargs)
+        self.patterns = patterns
+
+    def solve(self, max_iter: int=100) -> Dict[BinPattern, int] | None:
+        start = time.perf_counter()
+        demands = np.array([self.demands[item] for item in self.items])
+        master = self.master.incremental(demands, self.sparse_master)
+        master.add_columns(self.patterns)
+        objective, x, _ = master.solve()
+        self.status = MipSolverStatus.FINISHED
+        lower_bound = float(np.ceil(objective - 1e-6))
+        self.info = {
+            "cg_iterations": 0,
+            "cg_columns": master.num_columns,
+            "cg_lp_objective": objective,
+            "cg_lower_bound": lower_bound,
+            "cg_pricing_time": 0.,
+            "cg_enumerated": True,
+        }
+        return self._plan(master, x, lower_bound, start)
+
+
+def generate_column_generation(capacity: int, demands: Dict[int, int],
+                                enumeration_limit: int = ENUMERATION_LIMIT, **kwargs: Any) -> ColumnGeneration:
+    """Column generation, or the full pattern master if there are at most
+    ``enumeration_limit`` maximal patterns
+
+    Args:
+        capacity (int): bin capacity
+        demands (Dict[int, int]): demand of each item
+        enumeration_limit (int, optional): 0 to always generate columns. Defaults to ENUMERATION_LIMIT.
+        **kwargs: options of ``ColumnGeneration``
+
+    Returns:
+        ColumnGeneration: solver of the plan
+    """
+    patterns = maximal_patterns(capacity, list(demands), enumeration_limit) if enumeration_limit > 0 else None
+    if patterns is None:
+        return ColumnGeneration(capacity, demands, **kwargs)
+    return PatternEnumeration(capacity, demands, patterns, **kwargs)
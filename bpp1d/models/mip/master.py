@@ -0,0 +1,206 @@
+from typing import Dict, List, Tuple, Type
+import warnings
+from pulp import LpVariable, lpSum, LpProblem, LpAffineExpression
+from pulp import LpMinimize, LpInteger, LpContinuous, LpStatus, PULP_CBC_CMD
+import numpy as np
+from scipy.optimize import linprog, milp, Bounds, LinearConstraint
+from scipy.sparse import csr_matrix
+
+try:
+    import highspy
+except ImportError:
+    # without the HiGHS bindings, incremental masters are re-solved from scratch
+    highspy = None  # type: ignore[assignment]
+
+# objective, value of each pattern, dual of each demand constraint (None if not relaxed)
+MasterResult = Tuple[float, np.ndarray, np.ndarray | None]
+
+
+class MasterBackend:
+    """Solver of the master problem of cutting stock
+
+        min sum(x)  s.t.  patterns.T @ x >= demands, x >= 0
+
+    where each row of ``patterns`` is the item counts of one pattern.
+    """
+
+    def solve(self, patterns: np.ndarray, demands: np.ndarray, relax: bool = True,
+                time_limit: float | None = None) -> MasterResult:
+        """Solve the master problem
+
+        Args:
+            patterns (np.ndarray): pattern matrix, one row per pattern
+            demands (np.ndarray): demand of each item
+            relax (bool, optional): solve the LP relaxation. Defaults to True.
+            time_limit (float | None, optional): seconds for the integer problem, the best
+                solution found so far is returned. Defaults to None, no limit.
+
+        Returns:
+            MasterResult: objective, pattern usage and duals (only if relaxed)
+
+        Raises:
+            ValueError: no (feasible) solution found
+        """
+        raise NotImplementedError
+
+    def incremental(self, demands: np.ndarray, sparse: bool = False) -> 'IncrementalMaster':
+        """Create a master problem that persists across column generation iterations
+
+        Args:
+            demands (np.ndarray): demand of each item
+            sparse (bool, optional): pass the columns to the solver as a sparse matrix. Defaults to False.
+
+        Returns:
+            IncrementalMaster: master problem without columns
+        """
+        return IncrementalMaster(self, demands, sparse)
+
+
+class IncrementalMaster:
+    """Restricted master problem to which columns are appended.
+
+    Columns are kept in a growable pattern matrix. This implementation re-solves
+    the whole problem with its backend, subclasses may re-optimise from the
+    previous basis.
+    """
+
+    def __init__(self, backend: MasterBackend, demands: np.ndarray, sparse: bool = False) -> None:
+        self.backend = backend
+        self.demands = np.asarray(demands)
+        self.sparse = sparse
+        self.num_columns = 0
+        self._columns = np.zeros((max(2 * len(self.demands), 16), len(self.demands)), dtype=np.int64)
+
+    @property
+    def patterns(self) -> np.ndarray:
+        return self._columns[:self.num_columns]
+
+    def add_columns(self, columns: np.ndarray) -> None:
+        """Append patterns to the master problem
+
+        Args:
+            columns (np.ndarray): pattern matrix, one row per pattern
+        """
+        columns = np.atleast_2d(columns)
+        end = self.num_columns + len(columns)
+        if end > len(self._columns):
+            grown = np.zeros((max(end, 2 * len(self._columns)), len(self.demands)), dtype=np.int64)
+            grown[:self.num_columns] = self.patterns
+            self._columns = grown
+        self._columns[self.num_columns:end] = np.round(columns)
+        self.num_columns = end
+
+    def solve(self, relax: bool = True, time_limit: float | None = None) -> MasterResult:
+        patterns = csr_matrix(self.patterns) if self.sparse and relax else self.patterns
+        return self.backend.solve(patterns, self.demands, relax, time_limit)
+
+
+class PulpMaster(MasterBackend):
+    """Reference backend, builds a PuLP model and calls CBC
+    """
+
+    def solve(self, patterns: np.ndarray, demands: np.ndarray, relax: bool = True,
+                time_limit: float | None = None) -> MasterResult:
+        master_prob = LpProblem("MainProblem", LpMinimize)
+        vartype = LpContinuous if relax else LpInteger
+        num_patterns = patterns.shape[0]
+        # variables
+        x = {
+            j: LpVariable(f"x_{j}", lowBound=0, upBound=None, cat=vartype)
+            for j in range(num_patterns)
+        }
+
+        constraints: List[LpAffineExpression] = []
+        # constraint
+        for j, demand in enumerate(demands):
+            c =  lpSum(patterns[i, j] * x[i]
+                        for i in range(num_patterns)) >= demand
+            constraints.append(c)
+            master_prob += c
+
+        # object
+        master_prob += lpSum(x[i] for i in range(num_patterns))
+
+        master_prob.solve(PULP_CBC_CMD(msg = False, mip=not relax, timeLimit=time_limit))
+        duals = None
+        if relax:
+            duals = np.array([c.pi for _, c in master_prob.constraints.items()])
+        values = np.array([x[i].value() for i in range(num_patterns)])
+        if any(v is None for v in values):
+            raise ValueError(f"Master problem not solved: {LpStatus[master_prob.status]}")
+        return master_prob.objective.value(), values, duals
+
+
+class HighsMaster(MasterBackend):
+    """In-process backend using HiGHS through scipy, duals are the constraint marginals
+    """
+
+    def solve(self, patterns: np.ndarray, demands: np.ndarray, relax: bool = True,
+                time_limit: float | None = None) -> MasterResult:
+        cost = np.ones(patterns.shape[0])
+        if relax:
+            res = linprog(cost, A_ub=-patterns.T, b_ub=-np.asarray(demands), bounds=(0, None), method='highs')
+            if res.status != 0:
+                raise ValueError(f"Master problem not solved: {res.message}")
+            # marginals are d(objective)/d(b_ub) with b_ub = -demands
+            return res.fun, res.x, -res.ineqlin.marginals
+        else:
+            res = milp(cost, integrality=np.ones_like(cost), bounds=Bounds(0, np.inf),
+                        constraints=LinearConstraint(patterns.T, lb=demands, ub=np.inf),
+                        options={} if time_limit is None else {'time_limit': time_limit})
+            if res.x is None:
+                raise ValueError(f"Master problem not solved: {res.message}")
+            return res.fun, np.round(res.x), None
+
+    def incremental(self, demands: np.ndarray, sparse: bool = False) -> IncrementalMaster:
+        if highspy is None:
+            warnings.warn("highspy is not installed, the master problem is re-solved from scratch "
+                            "at every column generation iteration")
+            return super().incremental(demands, sparse)
+        return HighsIncrementalMaster(self, demands, sparse)
+
+
+class HighsIncrementalMaster(IncrementalMaster):
+    """Keeps a HiGHS model alive, so that the LP relaxation is re-optimised from the
+    previous basis after columns are added. Integer solves go through the backend.
+    """
+
+    def __init__(self, backend: MasterBackend, demands: np.ndarray, sparse: bool = False) -> None:
+        super().__init__(backend, demands, sparse)
+        self._highs = highspy.Highs()
+        self._highs.setOptionValue('output_flag', False)
+        num_rows = len(self.demands)
+        self._highs.addRows(num_rows, self.demands.astype(float), np.full(num_rows, highspy.kHighsInf),
+                            0, np.zeros(num_rows, dtype=np.int32), np.array([], dtype=np.int32), np.array([]))
+
+    def add_columns(self, columns: np.ndarray) -> None:
+        start = self.num_columns
+        super().add_columns(columns)
+        added = self.patterns[start:]
+        rows, cols = np.nonzero(added)
+        starts = np.searchsorted(rows, np.arange(len(added))).astype(np.int32)
+        self._highs.addCols(len(added), np.ones(len(added)), np.zeros(len(added)),
+                            np.full(len(added), highspy.kHighsInf), len(rows), starts,
+                            cols.astype(np.int32), added[rows, cols].astype(float))
+
+    def solve(self, relax: bool = True, time_limit: float | None = None) -> MasterResult:
+        if not relax:
+            return super().solve(relax, time_limit)
+        self._highs.run()
+        if self._highs.getModelStatus() != highspy.HighsModelStatus.kOptimal:
+            raise ValueError(f"Master problem not solved: {self._highs.getModelStatus()}")
+        solution = self._highs.getSolution()
+        return (self._highs.getInfo().objective_function_value,
+                np.array(solution.col_value), np.array(solution.row_dual))
+
+
+MASTER_BACKENDS: Dict[str, Type[MasterBackend]] = {
+    'pulp': PulpMaster,
+    'highs': HighsMaster,
+}
+
+
+def generate_master(name: str) -> MasterBackend:
+    if name not in MASTER_BACKENDS:
+        raise NotImplementedError(f"Master backend {name} is not implemented")
+    return MASTER_BACKENDS[name]()
@@ -0,0 +1,99 @@
+from collections import OrderedDict
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Tuple
+
+from bpp1d.structure import BinPattern
+
+# (capacity, ((item, demand), ...), ((option, value), ...))
+PlanKey = Tuple[int, Tuple[Tuple[int, int], ...], Tuple[Tuple[str, Any], ...]]
+
+DEFAULT_CACHE_SIZE = 128
+
+
+class PlanCache:
+    """Plans of column generation memoised by their inputs
+
+    Keys are the capacity, the demands with zero demands dropped and sorted by
+    item, and the solver options. The most recently used ``maxsize`` plans are
+    kept in memory, and with ``path`` every plan is also stored as a json file in
+    that directory, so it is shared between runs.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_CACHE_SIZE, path: Path | str | None = None) -> None:
+        self.maxsize = maxsize
+        self.path = Path(path) if path is not None else None
+        if self.path is not None:
+            self.path.mkdir(parents=True, exist_ok=True)
+        self._plans: 'OrderedDict[PlanKey, Dict[BinPattern, int]]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(capacity: int, demands: Dict[int, int], options: Dict | None = None) -> PlanKey:
+        return (
+            int(capacity),
+            tuple(sorted((int(i), int(d)) for i, d in demands.items() if d > 0)),
+            tuple(sorted((options or {}).items())),
+        )
+
+    def __len__(self) -> int:
+        return len(self._plans)
+
+    def get(self, key: PlanKey) -> Dict[BinPattern, int] | None:
+        """Look up a plan, counted as a hit or a miss
+
+        Args:
+            key (PlanKey): see ``PlanCache.key``
+
+        Returns:
+            Dict[BinPattern, int] | None: a copy of the plan, None if not cached
+        """
+        plan = self._plans.get(key)
+        if plan is not None:
+            self._plans.move_to_end(key)
+        elif self.path is not None:
+            plan = self._load(key)
+            if plan is not None:
+                self._remember(key, plan)
+        if plan is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return dict(plan)
+
+    def put(self, key: PlanKey, plan: Dict[BinPattern, int]) -> None:
+        self._remember(key, dict(plan))
+        if self.path is not None:
+            self._store(key, plan)
+
+    def _remember(self, key: PlanKey, plan: Dict[BinPattern, int]) -> None:
+        self._plans[key] = plan
+        self._plans.move_to_end(key)
+        while len(self._plans) > self.maxsize:
+            self._plans.popitem(last=False)
+
+    def _file(self, key: PlanKey) -> Path:
+        assert self.path is not None
+        digest = hashlib.sha1(json.dumps(key).encode()).hexdigest()
+        return self.path / f"{digest}.json"
+
+    def _load(self, key: PlanKey) -> Dict[BinPattern, int] | None:
+        file = self._file(key)
+        if not file.exists():
+            return None
+        with open(file) as f:
+            content = json.load(f)
+        if content["key"] != json.loads(json.dumps(key)):
+            return None
+        return {BinPattern(items): count for items, count in content["plan"]}
+
+    def _store(self, key: PlanKey, plan: Dict[BinPattern, int]) -> None:
+        file = self._file(key)
+        tmp = file.with_suffix(".tmp")
+        with open(tmp, "w") as f:
+            json.dump({"key": key, "plan": [[list(p.items), c] for p, c in plan.items()]}, f)
+        # readers never see a partial file
+        os.replace(tmp, file)
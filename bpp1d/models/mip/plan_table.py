@@ -0,0 +1,150 @@
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+import math
+
+import numpy as np
+
+from bpp1d.structure import BinPattern
+from .column_generation import MipSolverStatus
+from .enumeration import generate_column_generation
+from .rounding import scale_plan
+
+
+def demand_grid(items: Sequence[int], probs: Sequence[float], counts: Sequence[int],
+                opened_states: int = 0, opened_items: int = 10, seed: int = 0) -> np.ndarray:
+    """Demand vectors a replan may ask for
+
+    For each remaining item count ``n`` the demands are ``ceil(n * p)`` as in
+    ``DiscreteDemandEstimator``. With ``opened_states``, as many variants per count
+    are added where up to ``opened_items`` items, drawn from the distribution, are
+    held by opened bins and taken off the demands.
+
+    Args:
+        items (Sequence[int]): item sizes
+        probs (Sequence[float]): probability of each item
+        counts (Sequence[int]): remaining item counts
+        opened_states (int, optional): variants per count. Defaults to 0.
+        opened_items (int, optional): max items held by opened bins. Defaults to 10.
+        seed (int, optional): seed of the variants. Defaults to 0.
+
+    Returns:
+        np.ndarray: distinct demand vectors, one row each, columns in ``items`` order
+    """
+    rng = np.random.default_rng(seed)
+    p = np.asarray(probs, dtype=float)
+    rows: List[np.ndarray] = []
+    for n in counts:
+        base = np.array([math.ceil(n * q) for q in p], dtype=np.int64)
+        rows.append(base)
+        for _ in range(opened_states):
+            held = rng.multinomial(rng.integers(1, opened_items + 1), p / p.sum())
+            rows.append(np.maximum(base - held, 0))
+    return np.unique(np.array(rows, dtype=np.int64).reshape(-1, len(items)), axis=0)
+
+
+def _solve_demands(args: Tuple[int, Dict[int, int], Dict]) -> Dict[BinPattern, int] | None:
+    capacity, demands, cg_options = args
+    cg = generate_column_generation(capacity, demands, **cg_options)
+    plan = cg.solve()
+    return plan if cg.status == MipSolverStatus.FINISHED else None
+
+
+class PlanTable:
+    """Plans solved offline for a grid of demand vectors
+
+    All plans share one pattern matrix and are stored as rows of (pattern, count)
+    entries, so the table is a handful of integer arrays saved in one npz file.
+    ``nearest`` answers a query with the plan of the closest demand vector, scaled
+    and repaired to cover the queried demands.
+    """
+
+    def __init__(self, capacity: int, items: Sequence[int], keys: np.ndarray, patterns: np.ndarray,
+                    plan_ptr: np.ndarray, plan_pattern: np.ndarray, plan_count: np.ndarray) -> None:
+        self.capacity = capacity
+        self.items = [int(i) for i in items]
+        self.keys = keys
+        self.patterns = patterns
+        self.plan_ptr = plan_ptr
+        self.plan_pattern = plan_pattern
+        self.plan_count = plan_count
+        self._key_totals = keys.sum(axis=1)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @classmethod
+    def build(cls, capacity: int, items: Sequence[int], demands: np.ndarray,
+                cg_options: Dict | None = None, workers: int | None = None) -> 'PlanTable':
+        """Solve a plan for each demand vector, in parallel
+
+        Args:
+            capacity (int): bin capacity
+            items (Sequence[int]): item size of each column of demands
+            demands (np.ndarray): demand vectors, one row each
+            cg_options (Dict | None, optional): options of ``generate_column_generation``. Defaults to None.
+            workers (int | None, optional): number of processes. Defaults to None, one per core.
+
+        Returns:
+            PlanTable: plans of the demand vectors column generation solved
+        """
+        tasks = [(capacity, {int(i): int(d) for i, d in zip(items, row)}, cg_options or {})
+                    for row in demands]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            plans = list(executor.map(_solve_demands, tasks, chunksize=max(1, len(tasks) // 64)))
+
+        pattern_index: Dict[BinPattern, int] = {}
+        keys, ptr, entries, counts = [], [0], [], []
+        for row, plan in zip(demands, plans):
+            if plan is None:
+                continue
+            keys.append(row)
+            for pattern, count in plan.items():
+                entries.append(pattern_index.setdefault(pattern, len(pattern_index)))
+                counts.append(count)
+            ptr.append(len(entries))
+        return cls(capacity, items, np.array(keys, dtype=np.int64).reshape(-1, len(items)),
+                    BinPattern.encode(pattern_index, items).astype(np.int16),
+                    np.array(ptr, dtype=np.int64), np.array(entries, dtype=np.int32),
+                    np.array(counts, dtype=np.int32))
+
+    def save(self, path: Path | str) -> None:
+        np.savez_compressed(path, capacity=self.capacity, items=np.array(self.items), keys=self.keys,
+                            patterns=self.patterns, plan_ptr=self.plan_ptr,
+                            plan_pattern=self.plan_pattern, plan_count=self.plan_count)
+
+    @classmethod
+    def load(cls, path: Path | str) -> 'PlanTable':
+        with np.load(path) as data:
+            return cls(int(data['capacity']), data['items'].tolist(), data['keys'], data['patterns'],
+                        data['plan_ptr'], data['plan_pattern'], data['plan_count'])
+
+    def plan(self, idx: int) -> Dict[BinPattern, int]:
+        entries = slice(self.plan_ptr[idx], self.plan_ptr[idx + 1])
+        return {
+            BinPattern.from_counts(self.patterns[j], self.items): int(c)
+            for j, c in zip(self.plan_pattern[entries], self.plan_count[entries])
+        }
+
+    def nearest(self, capacity: int, demands: Dict[int, int],
+                    tolerance: float = 0.05) -> Dict[BinPattern, int] | None:
+        """Plan of the closest demand vector, if close enough
+
+        Args:
+            capacity (int): bin capacity
+            demands (Dict[int, int]): demand of each item
+            tolerance (float, optional): max L1 distance to the closest key, relative to
+                the total demand. Defaults to 0.05.
+
+        Returns:
+            Dict[BinPattern, int] | None: plan covering the demands, None on a miss
+        """
+        if capacity != self.capacity or len(self) == 0 or set(demands) != set(self.items):
+            return None
+        query = np.array([demands[i] for i in self.items], dtype=np.int64)
+        distances = np.abs(self.keys - query).sum(axis=1)
+        idx = int(np.argmin(distances))
+        total = query.sum()
+        if total <= 0 or distances[idx] > tolerance * total or self._key_totals[idx] <= 0:
+            return None
+        return scale_plan(self.plan(idx), total / self._key_totals[idx], demands, self.capacity)
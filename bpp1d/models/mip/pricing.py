@@ -0,0 +1,105 @@
+from typing import Callable, List, Sequence, Tuple
+import numpy as np
+
+
+def solve_knapsack(values: Sequence[float], weights: Sequence[int], capacity: int,
+                    bounds: Sequence[int] | None = None) -> Tuple[float, np.ndarray]:
+    """Integer knapsack by dynamic programming over capacities
+
+    Each item kind is split in binary multiplicities (1, 2, 4, ...) so the bounded
+    problem becomes a 0/1 knapsack, and each 0/1 piece is one vectorised update of
+    the value table, i.e. O(kinds * log(capacity) * capacity) NumPy work.
+
+    Args:
+        values (Sequence[float]): value of each item kind, e.g. the duals in pricing
+        weights (Sequence[int]): positive integer size of each item kind
+        capacity (int): knapsack capacity
+        bounds (Sequence[int] | None, optional): max count of each kind. Defaults to None, unbounded.
+
+    Returns:
+        Tuple[float, np.ndarray]: optimal value and count of each item kind
+    """
+    best, trace = _knapsack_table(values, weights, capacity, bounds)
+    return float(best[capacity]), trace(capacity)
+
+
+def knapsack_columns(values: Sequence[float], weights: Sequence[int], capacity: int,
+                        num_columns: int, bounds: Sequence[int] | None = None) -> List[Tuple[float, np.ndarray]]:
+    """Several good knapsack solutions from one dynamic programming table
+
+    Besides the optimum, for each item kind with positive value the best solution
+    forced to contain it is read from the same table, as its value plus the best
+    value within the remaining capacity. Candidates are distinct.
+
+    Args:
+        values (Sequence[float]): value of each item kind, e.g. the duals in pricing
+        weights (Sequence[int]): positive integer size of each item kind
+        capacity (int): knapsack capacity
+        num_columns (int): max number of solutions
+        bounds (Sequence[int] | None, optional): max count of each kind. Defaults to None, unbounded.
+
+    Returns:
+        List[Tuple[float, np.ndarray]]: value and counts of each solution, best first
+    """
+    best, trace = _knapsack_table(values, weights, capacity, bounds)
+    candidates = [(float(best[capacity]), trace(capacity))]
+    for i, (value, weight) in enumerate(zip(values, weights)):
+        if value <= 0 or weight > capacity:
+            continue
+        counts = trace(capacity - weight)
+        counts[i] += 1
+        if bounds is not None and counts[i] > bounds[i]:
+            continue
+        candidates.append((float(best[capacity - weight] + value), counts))
+    candidates.sort(key=lambda candidate: -candidate[0])
+
+    columns: List[Tuple[float, np.ndarray]] = []
+    seen = set()
+    for value, counts in candidates:
+        key = tuple(counts)
+        if key not in seen:
+            seen.add(key)
+            columns.append((value, counts))
+        if len(columns) == num_columns:
+            break
+    return columns
+
+
+def _knapsack_table(values: Sequence[float], weights: Sequence[int], capacity: int,
+                        bounds: Sequence[int] | None = None) -> Tuple[np.ndarray, Callable[[int], np.ndarray]]:
+    """fill the value table, returns it with a traceback from any capacity"""
+    pieces: List[Tuple[int, int]] = []
+    for i, (value, weight) in enumerate(zip(values, weights)):
+        bound = capacity // weight
+        if bounds is not None:
+            bound = min(bound, int(bounds[i]))
+        if value <= 0:
+            # never improves the objective
+            continue
+        multiple = 1
+        while bound > 0:
+            m = min(multiple, bound)
+            pieces.append((i, m))
+            bound -= m
+            multiple *= 2
+
+    # best[c]: best value within capacity c
+    best = np.zeros(capacity + 1)
+    take = np.zeros((len(pieces), capacity + 1), dtype=bool)
+    for p, (i, m) in enumerate(pieces):
+        w = weights[i] * m
+        candidate = best[:capacity + 1 - w] + values[i] * m
+        improved = candidate > best[w:]
+        take[p, w:] = improved
+        best[w:] = np.where(improved, candidate, best[w:])
+
+    def trace(c: int) -> np.ndarray:
+        counts = np.zeros(len(weights), dtype=np.int64)
+        for p in range(len(pieces) - 1, -1, -1):
+            if take[p, c]:
+                i, m = pieces[p]
+                counts[i] += m
+                c -= weights[i] * m
+        return counts
+
+    return best, trace
@@ -0,0 +1,108 @@
+from typing import Dict, List, Sequence, Tuple
+import numpy as np
+
+from bpp1d.structure import BinPattern
+
+
+def round_down(patterns: np.ndarray, x: np.ndarray, demands: np.ndarray,
+                items: Sequence[int], capacity: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Integer plan from a fractional master solution
+
+    Pattern usages are rounded down, the demand left uncovered is packed by
+    first fit decreasing over item counts and the resulting bins become extra
+    patterns.
+
+    Args:
+        patterns (np.ndarray): pattern matrix, one row per pattern
+        x (np.ndarray): fractional usage of each pattern
+        demands (np.ndarray): demand of each item
+        items (Sequence[int]): item size of each column of the patterns
+        capacity (int): bin capacity
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: pattern matrix and integer usage of each pattern
+    """
+    # tolerance, so that LP values such as 2.9999999 are kept as 3
+    usage = np.floor(np.asarray(x) + 1e-6).astype(np.int64)
+    residual = np.maximum(np.asarray(demands) - patterns.T @ usage, 0)
+    extra, extra_usage = ffd_counts(residual, items, capacity)
+    if len(extra) == 0:
+        return patterns, usage
+    return np.vstack((patterns, extra)), np.concatenate((usage, extra_usage))
+
+
+def ffd_counts(counts: np.ndarray, items: Sequence[int], capacity: int) -> Tuple[np.ndarray, np.ndarray]:
+    """First fit decreasing over item counts
+
+    Bins are filled one at a time, largest items first, and a filled bin is
+    repeated as long as the remaining counts allow it, so the cost depends on the
+    number of distinct bins instead of the number of items.
+
+    Args:
+        counts (np.ndarray): number of items of each size
+        items (Sequence[int]): item size of each entry of counts
+        capacity (int): bin capacity
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: distinct bins as count vectors, one row each, and their usage
+    """
+    remaining = np.array(counts, dtype=np.int64)
+    order = np.argsort(items)[::-1]
+    bins: List[np.ndarray] = []
+    usage: List[int] = []
+    while remaining.any():
+        b = np.zeros(len(remaining), dtype=np.int64)
+        space = capacity
+        for i in order:
+            if remaining[i] > 0 and items[i] <= space:
+                b[i] = min(remaining[i], space // items[i])
+                space -= b[i] * items[i]
+        used = b > 0
+        if not used.any():
+            raise ValueError("Item exceed bin capacity")
+        repeat = int(np.min(remaining[used] // b[used]))
+        remaining -= repeat * b
+        bins.append(b)
+        usage.append(repeat)
+    return np.array(bins, dtype=np.int64).reshape(-1, len(remaining)), np.array(usage, dtype=np.int64)
+
+
+def scale_plan(plan: Dict[BinPattern, int], factor: float, demands: Dict[int, int],
+                capacity: int) -> Dict[BinPattern, int]:
+    """Plan for demands that are about ``factor`` times those ``plan`` was solved for
+
+    Pattern counts are scaled and rounded down, the demand left uncovered is
+    packed by first fit decreasing.
+
+    Args:
+        plan (Dict[BinPattern, int]): number of bins of each pattern
+        factor (float): ratio of the new demands to the old ones
+        demands (Dict[int, int]): new demand of each item
+        capacity (int): bin capacity
+
+    Returns:
+        Dict[BinPattern, int]: number of bins of each pattern, covering the demands
+    """
+    items = list(demands)
+    patterns, usage = round_down(BinPattern.encode(plan, items), np.array(list(plan.values())) * factor,
+                                    np.array([demands[i] for i in items]), items, capacity)
+    return to_plan(patterns, usage, items)
+
+
+def to_plan(patterns: np.ndarray, usage: np.ndarray, items: Sequence[int]) -> Dict[BinPattern, int]:
+    """Plan of a pattern matrix with integer usage, equal patterns are merged
+
+    Args:
+        patterns (np.ndarray): pattern matrix, one row per pattern
+        usage (np.ndarray): number of bins of each pattern
+        items (Sequence[int]): item size of each column of the matrix
+
+    Returns:
+        Dict[BinPattern, int]: number of bins of each pattern
+    """
+    plan: Dict[BinPattern, int] = {}
+    for counts, count in zip(patterns, usage):
+        if count > 0:
+            pattern = BinPattern.from_counts(counts, items)
+            plan[pattern] = plan.get(pattern, 0) + int(count)
+    return plan
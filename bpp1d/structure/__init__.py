@@ -1,6 +1,8 @@
 from .bin_solution import BinSolution
 from .potential_solution import PotentialSolution
 from .bpp_bin import BppBin, BinWithPattern
+from .bin_store import BinStore, BinView
+from .level_histogram import LevelHistogram
 from .bin_pattern import BinPattern
 from .bpp_plan import BppPlan
 from .solution import Solution
@@ -10,6 +12,9 @@ __all__ = [
     "BinSolution",
     "BppBin",
     "BinWithPattern",
+    "BinStore",
+    "BinView",
+    "LevelHistogram",
     "BinPattern",
     "BppPlan",
     "PotentialSolution"
@@ -1,28 +1,97 @@
-from typing import Dict, Iterable, List, Tuple
+from typing import Dict, Iterable, List, Sequence, Tuple
+from itertools import groupby
+from weakref import WeakValueDictionary
 import numpy as np
-import json 
+import json
 
 
 
 class BinPattern:
+    """Multiset of item sizes that fills a bin.
+
+    Patterns are interned: creating a pattern with the same items returns the same
+    object, so equality is identity in practice and the hash is computed once.
+    Besides the sorted ``items``, a pattern stores its count vector as distinct
+    ``sizes`` with their ``counts``.
+    """
+    __slots__ = ('items', 'sizes', 'counts', '_hash', '__weakref__')
+    _registry: 'WeakValueDictionary[Tuple[int, ...], BinPattern]' = WeakValueDictionary()
+
+    items: Tuple[int, ...]
+    sizes: Tuple[int, ...]
+    counts: Tuple[int, ...]
+    _hash: int
+
+    def __new__(cls, items:Iterable[int]) -> 'BinPattern':
+        key = tuple(sorted(items))
+        pattern = cls._registry.get(key)
+        if pattern is None:
+            pattern = super().__new__(cls)
+            pattern.items = key
+            grouped = [(size, len(list(group))) for size, group in groupby(key)]
+            pattern.sizes = tuple(size for size, _ in grouped)
+            pattern.counts = tuple(count for _, count in grouped)
+            pattern._hash = hash(key)
+            cls._registry[key] = pattern
+        return pattern
+
+    @classmethod
+    def from_counts(cls, counts: Sequence[int] | np.ndarray, item_order: Sequence[int]) -> 'BinPattern':
+        """create pattern from a count vector
 
-    def __init__(self, items:Iterable[int]) -> None:
-        self.items = tuple(sorted(items))
-        self.modified = False
+        Args:
+            counts (Sequence[int] | np.ndarray): number of each item in the pattern
+            item_order (Sequence[int]): item size of each entry of counts
+
+        Returns:
+            BinPattern: the interned pattern
+        """
+        return cls(np.repeat(np.asarray(item_order), np.asarray(counts, dtype=np.int64)).tolist())
+
+    @staticmethod
+    def encode(patterns: Iterable['BinPattern'], item_order: Sequence[int]) -> np.ndarray:
+        """encode patterns to a pattern matrix
+
+        Args:
+            patterns (Iterable[BinPattern]): patterns, one row each
+            item_order (Sequence[int]): item size of each column
+
+        Returns:
+            np.ndarray: matrix of item counts, sizes not in item_order are ignored
+        """
+        column = {item: j for j, item in enumerate(item_order)}
+        rows, cols, values = [], [], []
+        num_patterns = 0
+        for i, pattern in enumerate(patterns):
+            num_patterns += 1
+            for size, count in zip(pattern.sizes, pattern.counts):
+                if size in column:
+                    rows.append(i)
+                    cols.append(column[size])
+                    values.append(count)
+        arr = np.zeros((num_patterns, len(column)), dtype=int)
+        arr[rows, cols] = values
+        return arr
 
     def __eq__(self, other: object) -> bool:
+        if self is other:
+            return True
         if not isinstance(other, BinPattern):
             return NotImplemented
         return self.items == other.items
 
     def __hash__(self):
-        return hash(";".join(map(str, self.items)))
+        return self._hash
+
+    def __reduce__(self):
+        # unpickled patterns are interned again
+        return (BinPattern, (self.items,))
 
     def __contains__(self, item) -> bool:
-        return item in self.items
+        return item in self.sizes
 
     def as_dict(self) -> Dict[int, int]:
-        return {i:self.items.count(i) for i in set(self.items)}
+        return dict(zip(self.sizes, self.counts))
 
     def comp(self, target: List[int]) -> Tuple[List[int], List[int], List[int]]:
         """compare with target bin, to see how many items in common
@@ -32,7 +101,7 @@ class BinPattern:
 
         Returns:
             Tuple[List[int], List[int], List[int]]: return a tuple of comparison results: (common, ldiff, rdiff),
-            where: 
+            where:
                 - common: packed items
                 - ldiff: in pattern but not in bin, i.e. empty slots
                 - rdiff: in bin but not in pattern, i.e. items not in plan
@@ -67,11 +136,7 @@ class BinPattern:
         return self.items.__repr__()
 
     def to_np(self, item_order):
-        counts = {i: self.items.count(i) for i in item_order}
-        arr = np.zeros(len(item_order), dtype=int)
-        for i in counts:
-            arr[i] = counts[i]
-        return arr
+        return BinPattern.encode([self], item_order)[0]
 
     def to_json(self) -> str:
-        return json.dumps({i: self.items.count(i) for i in set(self.items)})
+        return json.dumps(self.as_dict())
@@ -1,20 +1,45 @@
-from typing import Sequence
+from functools import cached_property
+from typing import List, Sequence
 from .solution import Solution
 import json
+import numpy as np
 
-from bpp1d.structure.bpp_bin import BppBin, BinWithPattern
+from bpp1d.structure.bpp_bin import BppBin
+from bpp1d.structure.bin_store import BinStore, BinView
 
 
 
 
 class BinSolution(Solution):
-    def __init__(self,capacity: int, bins:Sequence[BppBin] | None = None) -> None:
-        self.bins = [b for b in bins if not b.empty] if bins is not None else []
+    """Solution as a list of non-empty bins.
+
+    Aggregated statistics are computed once from the levels and item counts of
+    the bins, taken directly from the arrays when the bins are a ``BinStore``,
+    and cached, so the solution should not be modified after creation.
+    """
+    def __init__(self,capacity: int, bins:Sequence[BppBin] | BinStore | None = None) -> None:
         self.capacity = capacity
+        if isinstance(bins, BinStore):
+            nonempty = np.flatnonzero(bins.counts > 0)
+            self.bins: List[BppBin | BinView] = [bins[int(i)] for i in nonempty]
+            self.levels = bins.levels[nonempty]
+            self.item_counts = bins.counts[nonempty]
+        else:
+            self.bins = [b for b in bins if not b.empty] if bins is not None else []
+
+    @cached_property
+    def levels(self) -> np.ndarray:
+        """filled space of each bin"""
+        return np.fromiter((b.filled_space for b in self.bins), dtype=np.int64, count=len(self.bins))
+
+    @cached_property
+    def item_counts(self) -> np.ndarray:
+        """number of items in each bin"""
+        return np.fromiter((len(b) for b in self.bins), dtype=np.int64, count=len(self.bins))
 
     def __getitem__(self, key):
         if isinstance(key, slice):
-            return BinSolution(self.bins[key.start:key.stop], self.capacity)
+            return BinSolution(self.capacity, self.bins[key])
         else:
             return self.bins[key]
 
@@ -32,7 +57,7 @@ class BinSolution(Solution):
                                                         key=lambda b: b.empty_space, reverse=True)])
         return all_str
 
-    @property
+    @cached_property
     def metrics(self):
         return {
             'capacity': int(self.capacity),
@@ -41,22 +66,22 @@ class BinSolution(Solution):
             'waste': int(self.waste),
             'filled_rate': self.num_filled_bins / self.num_bins,
         }
-    @property
-    def waste(self):
-        return sum([b.empty_space for b in self.bins])
+    @cached_property
+    def waste(self) -> int:
+        return int(self.capacity * len(self.levels) - self.levels.sum())
 
-    @property
+    @cached_property
     def num_filled_bins(self) -> int:
-        return len([b for b in self.bins if b.filled_space == b.capacity])
+        return int(np.count_nonzero(self.levels == self.capacity))
 
 
     @property
     def num_bins(self) -> int:
         return len(self.bins)
 
-    @property 
-    def total_items(self):
-        return sum([len(b) for b in self.bins])
+    @cached_property
+    def total_items(self) -> int:
+        return int(self.item_counts.sum())
 
 
     def write(self, file_path):
@@ -71,18 +96,18 @@ class BinSolution(Solution):
     
     @property
     def min_filled_bin(self):
-        return min(self.bins, key=lambda b: b.filled_space)
+        return self.bins[int(np.argmin(self.levels))]
 
     @property
     def max_filled_bin(self):
-        return max(self.bins, key=lambda b: b.filled_space)
+        return self.bins[int(np.argmax(self.levels))]
 
     @property
     def data_obj(self):
         return {
             "metrics": self.metrics,
             "bins": [b.items for b in self.bins],
-            "patterns": [] if not all(isinstance(b, BinWithPattern) for b in self.bins)  \
+            "patterns": [] if not all(getattr(b, 'pattern', None) is not None for b in self.bins)  \
                             else [b.pattern.as_dict() for b in self.bins]
         }
 
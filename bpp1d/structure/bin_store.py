@@ -0,0 +1,302 @@
+from typing import Iterable, Iterator, List, Tuple, overload
+import json
+import numpy as np
+from numpy.typing import ArrayLike
+
+from .bin_pattern import BinPattern
+from .bpp_bin import BppBin
+
+
+DEFAULT_STORE_SIZE = 1024
+
+
+def _grow(arr: np.ndarray, size: int, fill: int = 0) -> np.ndarray:
+    new_arr = np.full(max(size, 2 * len(arr)), fill, dtype=arr.dtype)
+    new_arr[:len(arr)] = arr
+    return new_arr
+
+
+class BinStore:
+    """Array backed storage of bins (struct of arrays).
+
+    Levels, item counts and an integer tag of each bin are kept in growable NumPy
+    arrays, items are kept in a shared item array where the items of each bin are
+    chained as a linked list, so packing is O(1) without any per-bin object.
+    Indexing returns a ``BinView``, which behaves like ``BppBin`` (or
+    ``BinWithPattern`` if the bin has a pattern), so the store can replace a
+    ``List[BppBin]`` in models, ``BinPlanExecutor`` and ``BinSolution``.
+    """
+
+    def __init__(self, capacity: int, bins: Iterable[BppBin] | None = None,
+                    size: int = DEFAULT_STORE_SIZE) -> None:
+        self.capacity = capacity
+        self._num_bins = 0
+        self._levels = np.zeros(size, dtype=np.int64)
+        self._counts = np.zeros(size, dtype=np.int64)
+        self._tags = np.zeros(size, dtype=np.int64)
+        self._head = np.full(size, -1, dtype=np.int64)
+        self._tail = np.full(size, -1, dtype=np.int64)
+
+        self._num_items = 0
+        self._item_sizes = np.zeros(size, dtype=np.int64)
+        self._item_next = np.full(size, -1, dtype=np.int64)
+
+        self._patterns: List[BinPattern | None] = []
+        self._old_patterns: List[BinPattern | None] = []
+
+        if bins is not None:
+            for b in bins:
+                self.append(b)
+
+    @property
+    def levels(self) -> np.ndarray:
+        """filled space of each bin"""
+        return self._levels[:self._num_bins]
+
+    @property
+    def residuals(self) -> np.ndarray:
+        """empty space of each bin"""
+        return self.capacity - self.levels
+
+    @property
+    def counts(self) -> np.ndarray:
+        """number of items in each bin"""
+        return self._counts[:self._num_bins]
+
+    @property
+    def tags(self) -> np.ndarray:
+        """user defined integer label of each bin, e.g. the harmonic class"""
+        return self._tags[:self._num_bins]
+
+    @property
+    def num_items(self) -> int:
+        return self._num_items
+
+    def __len__(self) -> int:
+        return self._num_bins
+
+    @overload
+    def __getitem__(self, key: int) -> 'BinView': ...
+
+    @overload
+    def __getitem__(self, key: slice) -> List['BinView']: ...
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return [BinView(self, i) for i in range(*key.indices(self._num_bins))]
+        if key < 0:
+            key += self._num_bins
+        if not 0 <= key < self._num_bins:
+            raise IndexError("bin index out of range")
+        return BinView(self, key)
+
+    def __iter__(self) -> Iterator['BinView']:
+        return (BinView(self, i) for i in range(self._num_bins))
+
+    def __repr__(self) -> str:
+        return [self.items_of(i) for i in range(self._num_bins)].__repr__()
+
+    def index(self, target: 'BinView') -> int:
+        if isinstance(target, BinView) and target.store is self:
+            return target.idx
+        raise ValueError(f"{target} is not in store")
+
+    def open(self, items: Iterable[int] = (), pattern: BinPattern | None = None, tag: int = 0) -> int:
+        """Open a new bin
+
+        Args:
+            items (Iterable[int], optional): items packed into the new bin. Defaults to ().
+            pattern (BinPattern | None, optional): pattern of the bin. Defaults to None.
+            tag (int, optional): integer label of the bin. Defaults to 0.
+
+        Returns:
+            int: index of the new bin
+        """
+        idx = self._num_bins
+        if idx == len(self._levels):
+            self._levels = _grow(self._levels, idx + 1)
+            self._counts = _grow(self._counts, idx + 1)
+            self._tags = _grow(self._tags, idx + 1)
+            self._head = _grow(self._head, idx + 1, -1)
+            self._tail = _grow(self._tail, idx + 1, -1)
+        self._levels[idx] = 0
+        self._counts[idx] = 0
+        self._tags[idx] = tag
+        self._head[idx] = -1
+        self._tail[idx] = -1
+        self._patterns.append(pattern)
+        self._old_patterns.append(None)
+        self._num_bins += 1
+
+        for item in items:
+            self.pack(idx, item)
+        return idx
+
+    def append(self, b: BppBin) -> None:
+        """Copy a bin into the store, synonym of ``open`` for list compatibility
+
+        Args:
+            b (BppBin): bin to be copied, its pattern is kept if any
+        """
+        self.open(b.items, getattr(b, 'pattern', None))
+
+    def pack(self, idx: int, item: int) -> None:
+        """Pack a item to the bin ``idx``
+
+        Args:
+            idx (int): index of target bin
+            item (int): item to be packed
+
+        Raises:
+            ValueError: non-positive or exceed bin capacity
+        """
+        if not isinstance(item, (int, np.integer)):
+            raise ValueError("Item should be integer")
+        if item < 0:
+            raise ValueError("Item should be positive integer")
+        if item == 0 or item > self.capacity - self._levels[idx]:
+            raise ValueError("Item exceed bin capacity.\nItem:{}\nBin:{}".format(item, self.items_of(idx)))
+
+        pos = self._num_items
+        if pos == len(self._item_sizes):
+            self._item_sizes = _grow(self._item_sizes, pos + 1)
+            self._item_next = _grow(self._item_next, pos + 1, -1)
+        self._item_sizes[pos] = item
+        self._item_next[pos] = -1
+        if self._tail[idx] < 0:
+            self._head[idx] = pos
+        else:
+            self._item_next[self._tail[idx]] = pos
+        self._tail[idx] = pos
+        self._num_items += 1
+
+        self._levels[idx] += item
+        self._counts[idx] += 1
+
+    def _positions(self, idx: int) -> List[int]:
+        positions = []
+        pos = int(self._head[idx])
+        while pos >= 0:
+            positions.append(pos)
+            pos = int(self._item_next[pos])
+        return positions
+
+    def residual_of(self, idx: int) -> int:
+        return self.capacity - int(self._levels[idx])
+
+    def items_of(self, idx: int) -> List[int]:
+        return [int(self._item_sizes[pos]) for pos in self._positions(idx)]
+
+    def set_item(self, idx: int, key: int, value: int) -> None:
+        pos = self._positions(idx)[key]
+        self._levels[idx] += value - self._item_sizes[pos]
+        self._item_sizes[pos] = value
+
+    def pattern_of(self, idx: int) -> BinPattern | None:
+        return self._patterns[idx]
+
+    def set_pattern(self, idx: int, pattern: BinPattern) -> None:
+        if not self._old_patterns[idx]:
+            self._old_patterns[idx] = self._patterns[idx]
+        self._patterns[idx] = pattern
+
+
+class BinView:
+    """A ``BppBin`` compatible view of one bin of a ``BinStore``
+
+    ``items`` returns a copy, mutate the bin through ``pack`` or ``__setitem__``.
+    """
+    __slots__ = ('store', 'idx')
+
+    def __init__(self, store: BinStore, idx: int) -> None:
+        self.store = store
+        self.idx = idx
+
+    @property
+    def capacity(self) -> int:
+        return self.store.capacity
+
+    @property
+    def items(self) -> List[int]:
+        return self.store.items_of(self.idx)
+
+    def __len__(self) -> int:
+        return int(self.store._counts[self.idx])
+
+    def __setitem__(self, key: int, value: int) -> None:
+        self.store.set_item(self.idx, key, value)
+
+    def __getitem__(self, key: int) -> int:
+        return self.items[key]
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, BinView):
+            return NotImplemented
+        return self.store is other.store and self.idx == other.idx
+
+    def __hash__(self):
+        return hash((id(self.store), self.idx))
+
+    def to_np(self) -> ArrayLike:
+        return np.array(self.items)
+
+    @property
+    def empty_space(self) -> int:
+        return self.capacity - self.filled_space
+
+    @property
+    def filled_space(self) -> int:
+        return int(self.store._levels[self.idx])
+
+    @property
+    def empty(self) -> bool:
+        return self.store._counts[self.idx] == 0
+
+    @property
+    def full(self) -> bool:
+        return self.filled_space == self.capacity
+
+    def pack(self, item: int) -> None:
+        self.store.pack(self.idx, item)
+
+    def append(self, item: int) -> None:
+        self.pack(item)
+
+    @property
+    def pattern(self) -> BinPattern | None:
+        return self.store.pattern_of(self.idx)
+
+    @pattern.setter
+    def pattern(self, value: BinPattern) -> None:
+        self.store.set_pattern(self.idx, value)
+
+    @property
+    def old_pattern(self) -> BinPattern | None:
+        return self.store._old_patterns[self.idx]
+
+    def check(self) -> Tuple[List[int], List[int], List[int]]:
+        """return pattern checking result, same as ``BinWithPattern.check``
+        """
+        pattern = self.pattern
+        if pattern is None:
+            raise ValueError("Bin has no pattern")
+        return pattern.comp(self.items)
+
+    def __repr__(self) -> str:
+        if self.pattern is None:
+            return self.items.__repr__()
+        return str({
+            "items": self.items,
+            "pattern": self.pattern
+        })
+
+    def to_json(self) -> str:
+        if self.pattern is None:
+            return json.dumps(self.items)
+        return json.dumps({
+            "items": self.items,
+            "pattern": self.pattern.as_dict()
+        })
@@ -9,24 +9,44 @@ from .bin_pattern import BinPattern
 
 class BppBin(object):
     """Bin representation
+
+    The fill level is maintained incrementally, so ``filled_space``, ``empty_space``
+    and ``full`` are O(1). Mutate the bin through ``pack``, ``__setitem__`` or by
+    assigning ``items``; editing the ``items`` list in place bypasses the fill level.
     """
+    __slots__ = ('capacity', '_items', '_filled')
+
     def __init__(self, capacity:int, items: List | None = None) -> None:
         self.items = items if items is not None else []
         self.capacity = capacity
 
+    @property
+    def items(self) -> List[int]:
+        return self._items
+
+    @items.setter
+    def items(self, value: List[int]) -> None:
+        self._items = value
+        self._filled = sum(value)
+
     def __len__(self) -> int:
-        return len(self.items)
+        return len(self._items)
 
         
     def __setitem__(self, key:int, value:int) -> None:
-        self.items[key] = value
+        if isinstance(key, slice):
+            self._items[key] = value
+            self._filled = sum(self._items)
+        else:
+            self._filled += value - self._items[key]
+            self._items[key] = value
 
     def __getitem__(self, key:int) -> int:
-        return self.items[key]
+        return self._items[key]
 
 
     def __iter__(self):
-        return iter(self.items)
+        return iter(self._items)
 
     def to_np(self) -> ArrayLike:
         return np.array(self.items)
@@ -37,15 +57,15 @@ class BppBin(object):
 
     @property
     def filled_space(self) -> int:
-        return sum(self.items)
+        return self._filled
 
     @property
     def empty(self) -> bool:
-        return not self.items
+        return not self._items
 
     @property
     def full(self) -> bool:
-        return sum(self.items) == self.capacity
+        return self._filled == self.capacity
 
     def pack(self, item: int) -> None:
         """Pack a item to the bin
@@ -59,8 +79,9 @@ class BppBin(object):
         if not isinstance(item, int):
             raise ValueError("Item should be integer")
 
-        if item > 0 and item <= self.empty_space:
-            self.items.append(item)
+        if item > 0 and item <= self.capacity - self._filled:
+            self._items.append(item)
+            self._filled += item
         elif item < 0:
             raise ValueError("Item should be positive integer")
         else:
@@ -82,11 +103,12 @@ class BppBin(object):
     
 
 class BinWithPattern(BppBin):
-    old_pattern = None
+    __slots__ = ('_pattern', 'old_pattern')
+
     def __init__(self, capacity: int, pattern: BinPattern, items: List | None = None):
         super().__init__(capacity=capacity, items=items)
         self._pattern = pattern
-        # self.old_pattern = None
+        self.old_pattern: BinPattern | None = None
 
 
     @property
@@ -116,7 +138,7 @@ class BinWithPattern(BppBin):
     def to_json(self) -> str:
         return json.dumps({
             "items": self.items,
-            "pattern": self.pattern
+            "pattern": self.pattern.as_dict()
         })
 
 
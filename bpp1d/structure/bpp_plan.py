@@ -1,24 +1,44 @@
-from typing import  Dict, List, Tuple, Sequence
+from typing import  Dict, List, MutableSequence, Set, Tuple, Sequence
+from collections import Counter
+import heapq
 import json
 import numpy as np
 import math
 from .bpp_bin import BppBin, BinWithPattern
 from .bin_pattern import BinPattern
 
-from bpp1d.utils.heuristic_choice import HeuristicChoiceFn, best_fit_choice
+from bpp1d.utils.heuristic_choice import HeuristicChoiceFn, StatefulChoice, best_fit_choice
 
 
 
 class BppPlan:
+    """Remaining usage count of each pattern.
+
+    For each item size, patterns containing the item are kept in a heap ordered
+    by remaining count then insertion order, so ``match`` is O(log P). Heap entries
+    are pushed whenever a count changes and outdated ones are dropped lazily, so
+    counts must be changed through ``__setitem__`` or ``useone``, not ``plan_dict``.
+    """
     def __init__(self, pattern_dict:Dict[BinPattern, int], capacity: int) -> None:
         self.capacity = capacity
-        self.plan_dict = pattern_dict.copy()
+        self.plan_dict: Dict[BinPattern, int] = {}
+        self._patterns: List[BinPattern] = []
+        self._order: Dict[BinPattern, int] = {}
+        self._heaps: Dict[int, List[Tuple[float, int]]] = {}
+        for pattern, count in pattern_dict.items():
+            self[pattern] = count
 
 
     def __setitem__(self, key: Tuple | BinPattern, val: int) -> None:
         if not isinstance(key, BinPattern):
             key = BinPattern(key)
+        if key not in self._order:
+            self._order[key] = len(self._patterns)
+            self._patterns.append(key)
         self.plan_dict[key] = val
+        entry = (-val, self._order[key])
+        for item in set(key.items):
+            heapq.heappush(self._heaps.setdefault(item, []), entry)
 
     def __getitem__(self, key) -> int:
         return self.plan_dict[key]
@@ -31,7 +51,7 @@ class BppPlan:
     
 
     def to_np(self, item_order):
-        pattern_arrs = np.stack([p.to_np(item_order) for p in self.plan_dict])
+        pattern_arrs = BinPattern.encode(self.plan_dict, item_order)
 
         pattern_counts = np.array(list(self.plan_dict.values()))
         return pattern_arrs, pattern_counts
@@ -43,7 +63,12 @@ class BppPlan:
         })
 
     def copy(self) -> 'BppPlan':
-        return BppPlan(self.plan_dict, self.capacity)
+        plan = BppPlan({}, self.capacity)
+        plan.plan_dict = self.plan_dict.copy()
+        plan._patterns = self._patterns.copy()
+        plan._order = self._order.copy()
+        plan._heaps = {item: heap.copy() for item, heap in self._heaps.items()}
+        return plan
 
     def keys(self):
         return self.plan_dict.keys()
@@ -86,7 +111,7 @@ class BppPlan:
         """
 
         if pattern in self.plan_dict and self.plan_dict[pattern] > 0:
-            self.plan_dict[pattern] -= 1
+            self[pattern] = self.plan_dict[pattern] - 1
             return BinWithPattern(self.capacity, pattern)
         else:
             raise ValueError("Pattern not in plan")
@@ -101,12 +126,14 @@ class BppPlan:
             BinPattern | None: target pattern, None if no such pattern in plan
         """
 
-        candidates = {k: v for k, v in self.plan_dict.items() if item in k}
-        if not candidates or all(v == 0 for v in candidates.values()):
-            return None
-        
-        # mypy compatible method
-        return max(candidates, key=lambda k: candidates[k])
+        heap = self._heaps.get(item)
+        while heap:
+            neg_count, order = heap[0]
+            pattern = self._patterns[order]
+            if self.plan_dict[pattern] == -neg_count:
+                return pattern if neg_count < 0 else None
+            heapq.heappop(heap)
+        return None
 
     
 def new_bin_with_pattern_callback(capacity: int, pattern: BinPattern):
@@ -119,12 +146,12 @@ class OutOfPlanException(Exception):
 
 class BinPlanExecutor:
     def __init__(self, plan: BppPlan, capacity: int, # demands: Dict[int, int],
-                    bins:List[BinWithPattern] | None=None, 
+                    bins:MutableSequence[BinWithPattern] | None=None, 
                     shall_rebalance = True,
                     balance_empty_threshold=0.2,
                     balance_k_bins = 200) -> None:
-        self.bins = bins if bins is not None else []
         self.capacity = capacity
+        self.bins = bins if bins is not None else []
         self.plan = plan
         # self.demands = demands
         self.extra_demands = {} # stores items that been replaced out
@@ -132,7 +159,6 @@ class BinPlanExecutor:
         self.balance_k_bins = balance_k_bins
         self.shall_rebalance = shall_rebalance
         self.fallback_count = 0
-        # self.empty_slots = {}
 
 
 
@@ -142,23 +168,92 @@ class BinPlanExecutor:
 
     @plan.setter
     def plan(self, value: BppPlan):
+        # slots belong to the opened bins, so the index survives plan swaps
         self._plan = value.copy()
 
+    @property
+    def bins(self) -> MutableSequence[BinWithPattern]:
+        return self._bins
+
+    @bins.setter
+    def bins(self, value: MutableSequence[BinWithPattern]):
+        self._bins = value
+        # empty slots of each bin, and heaps of bin indices per item size with empty slots,
+        # entries of bins whose slot got filled are dropped lazily
+        self.empty_slots: List[Dict[int, int]] = []
+        self._slot_bins: Dict[int, List[int]] = {}
+        # items packed outside the pattern of their bin, per bin and summed over the bins not full
+        self._bin_unplanned: List[Counter] = []
+        self._unplanned: Counter = Counter()
+        # bins packed through their slots since the last fallback, reported to indexed choices,
+        # None until such a choice is used so that nothing is recorded for plain functions
+        self._packed: Set[int] | None = None
+        self._sync_slots()
+
+    @property
+    def unplanned_items(self) -> Dict[int, int]:
+        """number of items of each size packed outside the pattern of their bin,
+        over the bins not full, i.e. the sum of ``check()[2]`` of these bins
+        """
+        self._sync_slots()
+        return self._unplanned
+
+    def _index_slots(self, idx: int) -> None:
+        _, empty_items, unplanned = self._bins[idx].check()
+        slots = Counter(empty_items)
+        if idx == len(self.empty_slots):
+            self.empty_slots.append(slots)
+            self._bin_unplanned.append(Counter())
+        else:
+            self.empty_slots[idx] = slots
+        for i in slots:
+            heapq.heappush(self._slot_bins.setdefault(i, []), idx)
+        self._release_unplanned(idx)
+        if not self._bins[idx].full:
+            self._bin_unplanned[idx] = Counter(unplanned)
+            self._unplanned.update(self._bin_unplanned[idx])
+
+    def _release_unplanned(self, idx: int) -> None:
+        """drop the unplanned items of a bin from the sum, e.g. once it is full"""
+        self._unplanned.subtract(self._bin_unplanned[idx])
+        self._bin_unplanned[idx] = Counter()
+
+    def _sync_slots(self) -> None:
+        for idx in range(len(self.empty_slots), len(self._bins)):
+            self._index_slots(idx)
+
+    def _match_slot(self, item: int) -> int:
+        """Return the first bin having an empty slot for the item, -1 if none
+        """
+        self._sync_slots()
+        heap = self._slot_bins.get(item)
+        while heap:
+            idx = heap[0]
+            # bins only lose empty space, so an entry failing either check never comes back
+            if self.empty_slots[idx].get(item, 0) > 0 and self._bins[idx].empty_space >= item:
+                return idx
+            heapq.heappop(heap)
+        return -1
+
     def is_fit(self, item: int) -> bool:
         for pattern, count in self.plan.items():
             if item in pattern and count > 0:
                 return True
         
-        check_bin_fit = [b.check()[1] for b in self.bins]
-        any_bin_fit = any(item in c for c in check_bin_fit)
-        return any_bin_fit
+        return self._match_slot(item) >= 0
 
     def heuristic_put(self, item: int, fallback: HeuristicChoiceFn) -> int:
+        self._sync_slots()
+        if isinstance(fallback, StatefulChoice):
+            for idx in self._packed or ():
+                fallback.update(idx)
+            self._packed = set()
         choice = fallback(item, self.bins)
 
         if choice < 0:
             self.bins.append(BinWithPattern(self.capacity, 
                                             pattern=BinPattern([item, self.capacity-item]), items=[item]))
+            self._sync_slots()
             return choice
         else:
             # adjust pattern and record replacement
@@ -181,24 +276,28 @@ class BinPlanExecutor:
             # the items that involved in current plan
             for i in replacement:
                 self.extra_demands[i] = self.extra_demands.get(i, 0)+ 1
-                # self.empty_slots[i] -= 1
 
             target_bin.pack(item)
+            self._index_slots(choice)
             return choice       
         
 
 
     def put(self, item: int, fallback: HeuristicChoiceFn | None = None) -> int:
-        matched_bins = [b for b in self.bins if item in b.check()[1] and b.empty_space >= item]
+        matched = self._match_slot(item)
         # number of bins whose filled space less than threshold
         # num_nonfill_bins = len([ b for b in self.bins 
                                 # if b.filled_space / b.capacity < self.balance_empty_threshold])
         
 
-        if matched_bins:
-            choice = self.bins.index(matched_bins[0])
-            matched_bins[0].pack(item)
-            # self.empty_slots[item] -= 1
+        if matched >= 0:
+            choice = matched
+            self.bins[choice].pack(item)
+            self.empty_slots[choice][item] -= 1
+            if self._packed is not None:
+                self._packed.add(choice)
+            if self.bins[choice].full:
+                self._release_unplanned(choice)
             return choice
         # elif (num_nonfill_bins >= self.balance_k_bins 
         #         and self.shall_rebalance):
@@ -212,10 +311,8 @@ class BinPlanExecutor:
                 # find a pattern can be put into plan
                 newbin = self.plan.useone(pattern)
                 newbin.pack(item)
-                # _, _, empty_items = newbin.check()
-                # for i in empty_items:
-                #     self.empty_slots[i] = self.empty_slots.get(i, 0) + 1
                 self.bins.append(newbin)
+                self._sync_slots()
                 choice = -1
                 return choice
 
@@ -0,0 +1,67 @@
+from bisect import bisect_left, insort
+from typing import List
+import numpy as np
+
+from .potential_solution import PotentialSolution
+
+
+class LevelHistogram:
+    """Open bins represented by the number of bins at each fill level.
+
+    This is the potential representation of ``Bpp1DPotentialEnv``: ``potential[h]``
+    is the number of open bins filled up to ``h`` (index 0 is unused), full bins
+    are only counted. Memory is O(capacity) however many bins are open, and the
+    non-empty levels are kept sorted for O(log C) lookups by level heuristics.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self.potential = np.zeros(capacity, dtype=np.int64)
+        self.filled_bins = 0
+        self.nonempty: List[int] = []
+
+    @property
+    def num_bins(self) -> int:
+        return len(self) + self.filled_bins
+
+    def __len__(self) -> int:
+        """return number of open bins
+        """
+        return int(self.potential.sum())
+
+    def __getitem__(self, level: int) -> int:
+        return int(self.potential[level])
+
+    def _add(self, level: int, num: int) -> None:
+        self.potential[level] += num
+        count = self.potential[level]
+        if count == 0:
+            del self.nonempty[bisect_left(self.nonempty, level)]
+        elif count == num:
+            insort(self.nonempty, level)
+
+    def pack(self, item: int, level: int) -> None:
+        """Pack a item into a bin at given level
+
+        Args:
+            item (int): item to be packed
+            level (int): fill level of target bin, 0 to open a new bin
+
+        Raises:
+            ValueError: no open bin at the level, or item exceed bin capacity
+        """
+        if item <= 0 or level + item > self.capacity:
+            raise ValueError(f"Item exceed bin capacity.\nItem:{item}\nLevel:{level}")
+        if level != 0:
+            if self.potential[level] == 0:
+                raise ValueError(f"No open bin at level {level}")
+            self._add(level, -1)
+
+        if level + item == self.capacity:
+            self.filled_bins += 1
+        else:
+            self._add(level + item, 1)
+
+    def to_solution(self, choice_sequence: List | None = None) -> PotentialSolution:
+        return PotentialSolution(self.capacity, self.potential.astype(int).tolist(), self.filled_bins,
+                                    choice_sequence if choice_sequence is not None else [])
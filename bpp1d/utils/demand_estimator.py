@@ -1,8 +1,9 @@
+from collections import Counter
+from typing import Dict, List, Mapping, Sequence, Tuple
 
-from typing import Callable, Dict, Sequence
+import numpy as np
 
 from bpp1d.structure.bpp_bin import BinWithPattern
-import math
 
 from bpp3d_dataset.utils.distributions import Discrete
 
@@ -10,43 +11,55 @@ from bpp3d_dataset.utils.distributions import Discrete
 
 
 class DiscreteDemandEstimator:
+    """Expected demand of each item size over the remaining items.
+
+    With ``consider_opened_bins``, items packed outside the pattern of an open bin
+    (``check()[2]``) are taken off the estimate. ``estimate`` takes these counts
+    directly, e.g. ``BinPlanExecutor.unplanned_items`` which is kept up to date
+    while packing, so an estimate is O(item sizes) however many bins are open.
+    """
     def __init__(self, consider_opened_bins: bool = False, smooth=False):
         self.consider_opened_bins = consider_opened_bins
         self.smooth=smooth
+        # distribution of the cached item sizes and probabilities
+        self._support: Tuple[Discrete, List[int], np.ndarray] | None = None
 
-    def __call__(self, distribution: Discrete, remain_items: int, 
+    def __call__(self, distribution: Discrete, remain_items: int,
                     opened_bins: Sequence[BinWithPattern]) -> Dict[int, int]:
+        unplanned: Counter = Counter()
         if self.consider_opened_bins:
-            return _opened_bins_estimator(distribution, remain_items, opened_bins, self.smooth)
-        else:
-            return _simple_estimator(distribution, remain_items, opened_bins, self.smooth)
+            for b in opened_bins:
+                unplanned.update(b.check()[2])
+        return self.estimate(distribution, remain_items, unplanned)
+
+    def estimate(self, distribution: Discrete, remain_items: int,
+                    unplanned: Mapping[int, int] | None = None) -> Dict[int, int]:
+        """Estimate demands from counts of unplanned items
+
+        Args:
+            distribution (Discrete): item distribution
+            remain_items (int): number of items still to come
+            unplanned (Mapping[int, int] | None, optional): number of items of each size packed
+                outside the pattern of an open bin, ignored without ``consider_opened_bins``.
+                Defaults to None.
+
+        Returns:
+            Dict[int, int]: demand of each item size of the distribution
+        """
+        items, probs = self._arrays(distribution)
+        remains = np.ceil(remain_items * probs)
+        if self.smooth:
+            remains = np.maximum(remains, 1)
+        if self.consider_opened_bins and unplanned:
+            remains = np.maximum(remains - np.array([unplanned.get(i, 0) for i in items]), 0)
+        return dict(zip(items, remains.astype(np.int64).tolist()))
+
+    def _arrays(self, distribution: Discrete) -> Tuple[List[int], np.ndarray]:
+        if self._support is None or self._support[0] is not distribution:
+            self._support = (distribution, list(distribution.prob_dict),
+                                np.array(list(distribution.prob_dict.values()), dtype=float))
+        return self._support[1], self._support[2]
 
 
 def generate_discrete_demand_estimator(consider_opened_bins: bool = False, smooth=False):
     return DiscreteDemandEstimator(consider_opened_bins, smooth)
-    
-def _opened_bins_estimator(distribution: Discrete, remain_items: int, 
-                            opened_bins: Sequence[BinWithPattern], smooth: bool=False) -> Dict[int, int]:
-    if smooth:
-        estimate_remains = {i: max(math.ceil(remain_items * p), 1) for i, p in distribution.prob_dict.items()}
-    else:
-        estimate_remains = {i: math.ceil(remain_items * p) for i, p in distribution.prob_dict.items()}
-    for b in opened_bins:
-        # for item in b:
-        #     estimate_remains[item] = estimate_remains.get(item, 0) + 1
-        _, _, nonfilled = b.check()
-        # nonfilled_dict = { for i in set(nonfilled)}
-        for i in nonfilled:
-            estimate_remains[i] = max(estimate_remains[i] - 1, 0)
-
-        
-    return estimate_remains
-
-def _simple_estimator(distribution: Discrete, remain_items: int, 
-                        opened_bins: Sequence[BinWithPattern], smooth: bool=False) -> Dict[int, int]:
-    if smooth:
-        estimate_remains = {i: max(math.ceil(remain_items * p), 1) for i, p in distribution.prob_dict.items()}
-    else:
-        estimate_remains = {i: math.ceil(remain_items * p) for i, p in distribution.prob_dict.items()}
-    return estimate_remains
-
@@ -2,8 +2,9 @@ from pathlib import Path
 import json
 from typing import Dict, List, Sequence
 from bpp1d.models import VALID_MODELS, Model, RLModel, CGFit, CGReplan, CGStateShift
-from bpp1d.models.heruistics import HeuristicModel, HarmonicKModel
-from bpp1d.utils.heuristic_choice import generate_heuristic
+from bpp1d.models.mip import CG_OPTIONS, PlanCache, PlanTable
+from bpp1d.models.heruistics import HeuristicModel, HarmonicKModel, LevelHeuristicModel
+from bpp1d.utils.heuristic_choice import generate_heuristic, generate_level_heuristic
 from bpp3d_dataset.utils.distributions import Discrete, Uniform, Binomial, Poisson, generate_discrete_dist
 from bpp3d_dataset.problems import Problem, make_bpp, Bpp1DRandomInitiator
 
@@ -47,11 +48,21 @@ class BaseConfig:
 
 
 
+# heuristics only implemented on the level histogram
+LEVEL_ONLY_HEURISTICS = [
+    'sum_of_squares',
+    'sum_of_squares_dist',
+]
+
 
 class ExpModelConfig(BaseConfig):
     # TODO: predefine models
     def __init__(self, content: Path | str | Dict) -> None:
         super().__init__(content)
+        # plans shared by the models of all instances, by storage directory
+        self._plan_caches: Dict[str | None, PlanCache] = {}
+        # precomputed plan tables by file
+        self._plan_tables: Dict[str, PlanTable] = {}
     
     @property
     def models(self) -> List[str]:
@@ -67,10 +78,16 @@ class ExpModelConfig(BaseConfig):
         config = self.get_config(model_name)
         model_type = config['type']
         if model_type == 'heuristic':
-            if 'fit' in config['heuristic']:
+            if config.get('engine') == 'level' or config['heuristic'] in LEVEL_ONLY_HEURISTICS:
+                # bins only represented by their levels
+                items = self._generate_item_size(config.get('priori', {}), instance)
+                level_fn = generate_level_heuristic(config['heuristic'], items)
+                return LevelHeuristicModel(capacity, instance, name=model_name, choice_fn=level_fn, **config)
+            elif 'fit' in config['heuristic']:
                 choice_fn = generate_heuristic(config['heuristic'])
             elif config['heuristic'] == 'harmonic':
-                return HarmonicKModel(capacity, instance, K = config.get('K', 20))
+                return HarmonicKModel(capacity, instance, K = config.get('K', 20),
+                                        bin_store=config.get('bin_store', False))
             else:
                 raise NotImplementedError
                 
@@ -91,7 +108,8 @@ class ExpModelConfig(BaseConfig):
 
                 demand = {int(k): v for k ,v in config.get('demand', {}).items()}
             
-            return CGFit(capacity, instance, demand, name=model_name)
+            return CGFit(capacity, instance, demand, name=model_name, cg_options=self._cg_options(config),
+                            plan_cache=self._plan_cache(config))
 
         elif model_type == 'cg_replan':
             dist = config['priori']
@@ -100,7 +118,14 @@ class ExpModelConfig(BaseConfig):
             items = self._generate_item_size(dist, instance)
             distribution = generate_discrete_dist(dist_key=dist['name'], items=items, kwargs=dist)
             
-            return CGReplan(capacity, instance, distribution, consider_opened_bins=True)
+            return CGReplan(capacity, instance, distribution, consider_opened_bins=True,
+                            cg_options=self._cg_options(config), plan_cache=self._plan_cache(config),
+                            scale_tolerance=config.get('scale_tolerance'),
+                            column_pool_age=config.get('column_pool_age', 5),
+                            async_replan=config.get('async_replan', False),
+                            plan_table=self._plan_table(config),
+                            plan_table_tolerance=config.get('plan_table_tolerance', 0.05),
+                            delta_gap=config.get('delta_gap'))
 
         elif model_type == 'cg_shift':
             dist = config['priori']
@@ -121,6 +146,33 @@ class ExpModelConfig(BaseConfig):
         else:
             raise NotImplementedError(f"Model {model_type} is not implemented")
     
+    def _cg_options(self, config: Dict) -> Dict:
+        """column generation options of a model, e.g. {"master": "highs", "pricing": "dp"}
+        """
+        return {k: config[k] for k in CG_OPTIONS if k in config}
+
+    def _plan_cache(self, config: Dict) -> PlanCache | None:
+        """plan cache of a model, "plan_cache" is false to disable it, true (default)
+        for memory only or a directory to also store plans on disk
+        """
+        setting = config.get('plan_cache', True)
+        if setting is False:
+            return None
+        path = None if setting is True else str(setting)
+        if path not in self._plan_caches:
+            self._plan_caches[path] = PlanCache(path=path)
+        return self._plan_caches[path]
+
+    def _plan_table(self, config: Dict) -> PlanTable | None:
+        """plan table of a model, "plan_table" is the file written by ``plan precompute``
+        """
+        if 'plan_table' not in config:
+            return None
+        path = str(config['plan_table'])
+        if path not in self._plan_tables:
+            self._plan_tables[path] = PlanTable.load(path)
+        return self._plan_tables[path]
+
     def _generate_item_size(self, dist: Dict, instance: Sequence[int]):
         if 'items' in dist:
             if isinstance(dist['items'], List):
@@ -1,19 +1,40 @@
-from typing import Callable, Sequence
+from bisect import bisect_left, bisect_right, insort
+import heapq
+from typing import Callable, Dict, List, Sequence
+import numpy as np
 from bpp1d.structure import BppBin
+from bpp1d.structure.bin_store import BinStore
+from bpp1d.structure.level_histogram import LevelHistogram
 
 
-HeuristicChoiceFn = Callable[[int, Sequence[BppBin]], int]
+# bins a choice reads, a BinStore is read through its arrays
+Bins = Sequence[BppBin] | BinStore
+HeuristicChoiceFn = Callable[[int, Bins], int]
+# returns the level of target bin, 0 if a new bin is opened
+LevelChoiceFn = Callable[[int, LevelHistogram], int]
 
 
 def generate_heuristic(name: str) -> HeuristicChoiceFn:
     if name == 'best_fit':
-        return best_fit_choice
+        return BestFitChoice()
     elif name == 'first_fit':
-        return first_fit_choice
+        return FirstFitChoice()
     else:
         raise NotImplementedError
 
-def best_fit_choice(item: int, bins: Sequence[BppBin]) -> int:
+def generate_level_heuristic(name: str, items: Sequence[int] | None = None) -> LevelChoiceFn:
+    if name == 'best_fit':
+        return best_fit_level
+    elif name == 'worst_fit':
+        return worst_fit_level
+    elif name == 'sum_of_squares':
+        return SumOfSquaresChoice()
+    elif name == 'sum_of_squares_dist':
+        return SumOfSquaresChoice(items)
+    else:
+        raise NotImplementedError
+
+def best_fit_choice(item: int, bins: Bins) -> int:
     """Return the choice using best fit heuristic
 
     Args:
@@ -23,6 +44,12 @@ def best_fit_choice(item: int, bins: Sequence[BppBin]) -> int:
     Returns:
         int: choiced index of target bin, -1 if a new bin is opened
     """
+    if isinstance(bins, BinStore):
+        residuals = bins.residuals - item
+        if not len(residuals) or residuals.max() < 0:
+            return -1
+        return int(np.argmin(np.where(residuals >= 0, residuals, bins.capacity + 1)))
+
     zipped = [(idx, b) for idx, b in enumerate(bins) 
                             if b.empty_space - item >= 0]
     if len(zipped) == 0:
@@ -31,7 +58,7 @@ def best_fit_choice(item: int, bins: Sequence[BppBin]) -> int:
         choice = min(zipped, key=lambda z: z[1].empty_space - item)[0]
     return choice
 
-def first_fit_choice(item: int, bins: Sequence[BppBin]) -> int:
+def first_fit_choice(item: int, bins: Bins) -> int:
     """Return the choice using best fit heuristic
 
     Args:
@@ -41,6 +68,11 @@ def first_fit_choice(item: int, bins: Sequence[BppBin]) -> int:
     Returns:
         int: choiced index of target bin, -1 if a new bin is opened
     """
+    if isinstance(bins, BinStore):
+        fit_mask = bins.residuals >= item
+        choice = int(np.argmax(fit_mask)) if len(fit_mask) else -1
+        return choice if choice >= 0 and fit_mask[choice] else -1
+
     fit = [b for b in bins if b.empty_space - item >= 0]
     if len(fit) == 0:
         choice = -1
@@ -48,6 +80,256 @@ def first_fit_choice(item: int, bins: Sequence[BppBin]) -> int:
         choice = bins.index(fit[0])
     return choice
 
+
+class StatefulChoice:
+    """Base class of heuristic choices that keep an index over the bins.
+
+    An instance is a drop-in ``HeuristicChoiceFn``. The index follows the bins
+    sequence lazily: on every call, the bin chosen by the previous call and the
+    bins appended since then are re-read, assuming the caller packed the item
+    as instructed, and passing a different sequence rebuilds the index. Bins
+    packed by any other means should be reported with ``update``; otherwise the
+    choice is re-read until its residual is current, so it always fits, but
+    best fit may miss a tighter bin whose residual is outdated. Residuals of a
+    ``BinStore`` are read from its arrays.
+    """
+
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        """Drop the index, it will be rebuilt on next call
+        """
+        self._bins: Bins | None = None
+        self._residual_of: Callable[[int], int] | None = None
+        self._num_bins = 0
+        self._last_choice = -1
+        # residual of each bin when it was last read
+        self._residuals: List[int] = []
+        self._clear()
+
+    def __call__(self, item: int, bins: Bins) -> int:
+        self._sync(bins)
+        choice = self._choose(item)
+        # bins packed without update only get fuller, so a stale choice is re-read and dropped
+        while choice >= 0 and self._residual(choice) != self._residuals[choice]:
+            self._read(choice)
+            choice = self._choose(item)
+        self._last_choice = choice
+        return choice
+
+    def update(self, idx: int) -> None:
+        """Report that bin ``idx`` was packed outside of this choice
+
+        Args:
+            idx (int): index of the packed bin
+        """
+        if self._bins is not None and 0 <= idx < self._num_bins:
+            self._read(idx)
+
+    def _sync(self, bins: Bins) -> None:
+        if bins is not self._bins or len(bins) < self._num_bins:
+            self.reset()
+            self._bins = bins
+            if isinstance(bins, BinStore):
+                self._residual_of = bins.residual_of
+        if self._last_choice >= 0:
+            self._read(self._last_choice)
+        for idx in range(self._num_bins, len(bins)):
+            self._read(idx)
+        self._num_bins = len(bins)
+
+    def _residual(self, idx: int) -> int:
+        assert self._bins is not None
+        if self._residual_of is not None:
+            return self._residual_of(idx)
+        return self._bins[idx].empty_space
+
+    def _read(self, idx: int) -> None:
+        residual = self._residual(idx)
+        if idx == len(self._residuals):
+            self._residuals.append(0)
+        old = self._residuals[idx]
+        self._residuals[idx] = residual
+        self._track(idx, old, residual)
+
+    def _clear(self) -> None:
+        raise NotImplementedError
+
+    def _track(self, idx: int, old: int, residual: int) -> None:
+        raise NotImplementedError
+
+    def _choose(self, item: int) -> int:
+        raise NotImplementedError
+
+
+class BestFitChoice(StatefulChoice):
+    """Best fit with bins bucketed by residual capacity.
+
+    Non-empty residuals are kept sorted, so the tightest bucket fitting an item
+    is found by bisection, and each bucket is a heap of bin indices so that ties
+    resolve to the lowest index, as ``best_fit_choice`` does.
+    """
+
+    def _clear(self) -> None:
+        self._counts: Dict[int, int] = {}
+        self._buckets: Dict[int, List[int]] = {}
+        self._nonempty: List[int] = []
+
+    def _track(self, idx: int, old: int, residual: int) -> None:
+        if old == residual:
+            return
+        if old > 0:
+            self._counts[old] -= 1
+            if self._counts[old] == 0:
+                del self._nonempty[bisect_left(self._nonempty, old)]
+        if residual > 0:
+            self._counts[residual] = self._counts.get(residual, 0) + 1
+            if self._counts[residual] == 1:
+                insort(self._nonempty, residual)
+            # stale entries of other buckets are dropped lazily in _choose
+            heapq.heappush(self._buckets.setdefault(residual, []), idx)
+
+    def _choose(self, item: int) -> int:
+        pos = bisect_left(self._nonempty, item)
+        if pos == len(self._nonempty):
+            return -1
+        residual = self._nonempty[pos]
+        bucket = self._buckets[residual]
+        while self._residuals[bucket[0]] != residual:
+            heapq.heappop(bucket)
+        return bucket[0]
+
+
+class FirstFitChoice(StatefulChoice):
+    """First fit backed by a max-residual segment tree over bin indices.
+
+    The leftmost bin whose residual fits an item is found by descending from the
+    root, always preferring the left child when it can hold the item. The tree
+    doubles its number of leaves when bins outgrow it.
+    """
+
+    def _clear(self) -> None:
+        self._size = 1
+        self._tree: List[int] = [0, 0]
+
+    def _grow(self, min_size: int) -> None:
+        size = self._size
+        while size < min_size:
+            size *= 2
+        tree = [0] * (2 * size)
+        tree[size:size + self._size] = self._tree[self._size:]
+        for node in range(size - 1, 0, -1):
+            tree[node] = max(tree[2 * node], tree[2 * node + 1])
+        self._size, self._tree = size, tree
+
+    def _track(self, idx: int, old: int, residual: int) -> None:
+        if idx >= self._size:
+            self._grow(idx + 1)
+        node = self._size + idx
+        self._tree[node] = residual
+        node //= 2
+        while node:
+            self._tree[node] = max(self._tree[2 * node], self._tree[2 * node + 1])
+            node //= 2
+
+    def _choose(self, item: int) -> int:
+        tree = self._tree
+        if tree[1] < item:
+            return -1
+        node = 1
+        while node < self._size:
+            node *= 2
+            if tree[node] < item:
+                node += 1
+        return node - self._size
+
+
+def best_fit_level(item: int, levels: LevelHistogram) -> int:
+    """Return the choice using best fit heuristic on a level histogram
+
+    Args:
+        item (int): item to be packed
+        levels (LevelHistogram): open bins
+
+    Returns:
+        int: level of target bin, 0 if a new bin is opened
+    """
+    pos = bisect_right(levels.nonempty, levels.capacity - item)
+    return levels.nonempty[pos - 1] if pos > 0 else 0
+
+def worst_fit_level(item: int, levels: LevelHistogram) -> int:
+    """Return the choice using worst fit heuristic on a level histogram
+
+    Args:
+        item (int): item to be packed
+        levels (LevelHistogram): open bins
+
+    Returns:
+        int: level of target bin, 0 if a new bin is opened
+    """
+    if levels.nonempty and levels.nonempty[0] <= levels.capacity - item:
+        return levels.nonempty[0]
+    return 0
+
+
+class SumOfSquaresChoice:
+    """Sum-of-Squares heuristic on a level histogram.
+
+    Chooses the level minimising ``sum(N(h) ** 2)`` over the open levels
+    ``0 < h < C`` after packing, where ``N(h)`` is the number of bins at level
+    ``h``. Moving one bin from level ``h`` to ``h + s`` changes the objective by
+    ``-2N(h) + 1`` and ``2N(h + s) + 1``, so all candidates are scored with a few
+    vectorised operations in O(C). Ties go to the fuller bin.
+
+    If the item sizes of the distribution are given, a level is a dead end when
+    its gap cannot be filled exactly by any combination of item sizes. Dead-end
+    levels are left out of the objective and moves creating them are only taken
+    when every move does, which is the variant for distributions that are not
+    perfectly packable.
+    """
+
+    def __init__(self, items: Sequence[int] | None = None) -> None:
+        self.items = sorted(set(items)) if items is not None else None
+        self._dead_end: np.ndarray | None = None
+
+    def _dead_end_levels(self, capacity: int) -> np.ndarray:
+        if self._dead_end is None or len(self._dead_end) != capacity + 1:
+            if self.items is None:
+                self._dead_end = np.zeros(capacity + 1, dtype=bool)
+            else:
+                # unbounded subset sum over gaps
+                reachable = np.zeros(capacity + 1, dtype=bool)
+                reachable[0] = True
+                for gap in range(1, capacity + 1):
+                    reachable[gap] = any(reachable[gap - i] for i in self.items if i <= gap)
+                # dead_end[h] for level h, i.e. gap capacity - h
+                self._dead_end = ~reachable[::-1]
+        return self._dead_end
+
+    def __call__(self, item: int, levels: LevelHistogram) -> int:
+        capacity = levels.capacity
+        counts = levels.potential
+        dead_end = self._dead_end_levels(capacity)
+        weights = np.where(dead_end[:capacity], 0, counts)
+
+        # candidate h in [0, C - item], the bin moves from h to h + item
+        added = np.append(2 * weights[item:] + 1, 0)
+        added[:-1][dead_end[item:capacity]] = 0
+        removed = np.concatenate(([0], 1 - 2 * weights[1:capacity - item + 1]))
+        removed[1:][dead_end[1:capacity - item + 1]] = 0
+        delta = added + removed
+
+        valid = np.concatenate(([True], counts[1:capacity - item + 1] > 0))
+        if self.items is not None:
+            creates_dead_end = dead_end[item:capacity + 1] & (np.arange(item, capacity + 1) < capacity)
+            delta = delta + creates_dead_end * (4 * int(counts.max()) + 4)
+        delta = np.where(valid, delta, np.iinfo(np.int64).max)
+
+        # last minimum, i.e. the fullest bin on ties
+        return int(len(delta) - 1 - np.argmin(delta[::-1]))
+
+
 # def refined_harmonic(item: int, bins:Sequence[BppBin]) -> int:
 #     # see https://en.wikipedia.org/wiki/Harmonic_bin_packing
 #     # 
\ No newline at end of file
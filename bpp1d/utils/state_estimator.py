@@ -1,5 +1,6 @@
 
-from typing import Any, Callable, Sequence
+from collections import Counter, deque
+from typing import Any, Callable, Deque, Iterable, Sequence
 from bpp3d_dataset.utils.distributions import Discrete
 from sklearn.neighbors import KernelDensity
 from scipy.special import softmax
@@ -12,24 +13,95 @@ def kl_divergence(d1: Discrete, d2: Discrete) -> float:
 
 
 class StateEstimator:
-
-    def __init__(self, priori: Discrete):
+    """Estimate the item distribution from the items seen so far.
+
+    Items are either passed as a ``sequence`` to each call, counted in O(n), or
+    streamed through ``observe``, which keeps a running count of each item size
+    of the priori, so that calls without a sequence are O(k) for k item sizes.
+    The running counts may be limited to the last ``window`` items, or weight
+    each older item by a further factor ``decay``.
+    """
+
+    def __init__(self, priori: Discrete, window: int | None = None, decay: float | None = None):
+        if window is not None and decay is not None:
+            raise ValueError("Only one of window and decay can be set")
+        if decay is not None and not 0 < decay <= 1:
+            raise ValueError(f"Decay should be in (0, 1], got {decay}")
         self.priori = priori
+        self.window = window
+        self.decay = decay
+        self._index = {item: j for j, item in enumerate(priori.items)}
+        self.reset()
 
     @property
     def distribution(self):
         return self.priori
 
-    def is_fit(self, sequence: Sequence[int]) -> bool:
+    @property
+    def counts(self) -> np.ndarray:
+        """running count of each item size of the priori, decayed if ``decay`` is set"""
+        return self._counts / self._weight
+
+    def reset(self) -> None:
+        """forget the observed items"""
+        self._counts = np.zeros(len(self._index))
+        self._recent: Deque[int] = deque()
+        # weight of the last observed item, older items keep their smaller weight
+        # so decaying is O(1) per item
+        self._weight = 1.
+
+    def observe(self, items: int | Iterable[int]) -> None:
+        """Add items of the stream to the running counts
+
+        Args:
+            items (int | Iterable[int]): next item or items, sizes not in the priori are ignored
+        """
+        if isinstance(items, (int, np.integer)):
+            items = (items,)
+        for item in items:
+            j = self._index.get(item)
+            if j is None:
+                continue
+            if self.decay is not None:
+                self._weight /= self.decay
+                if self._weight > 1e100:
+                    self._counts /= self._weight
+                    self._weight = 1.
+            elif self.window is not None:
+                self._recent.append(j)
+                if len(self._recent) > self.window:
+                    self._counts[self._recent.popleft()] -= 1
+            self._counts[j] += self._weight
+
+    def _weights(self, sequence: Sequence[int] | None) -> np.ndarray:
+        """count of each item size in the sequence, or the running counts if None"""
+        if sequence is None:
+            return self.counts
+        counter = Counter(sequence)
+        return np.array([counter.get(i, 0) for i in self.priori.items], dtype=float)
+
+    def _discrete(self, weights: np.ndarray) -> Discrete:
+        total = weights.sum()
+        if total <= 0:
+            raise ValueError("No item of the priori to estimate from")
+        return Discrete((weights / total).tolist(), self.priori.items)
+
+    def is_fit(self, sequence: Sequence[int] | None = None) -> bool:
         raise NotImplementedError
 
-        
-    def estimate(self, sequence: Sequence[int]) -> Discrete:
-        weights = [sequence.count(i) for i in self.priori.items]
-        probs = [w / sum(weights) for w in weights]
-        return Discrete(probs, self.priori.items)
+    def estimate(self, sequence: Sequence[int] | None = None) -> Discrete:
+        """Estimate the distribution
+
+        Args:
+            sequence (Sequence[int] | None, optional): items to estimate from. Defaults to None,
+                the items streamed through ``observe``.
 
-    def update_priori(self, sequence: Sequence[int]):
+        Returns:
+            Discrete: distribution over the item sizes of the priori
+        """
+        return self._discrete(self._weights(sequence))
+
+    def update_priori(self, sequence: Sequence[int] | None = None):
         self.priori = self.estimate(sequence)
 
     def __call__(self, *args: Any, **kwargs: Any) -> Discrete:
@@ -43,46 +115,32 @@ class StateEstimator:
 
 
 class SimpleStateEstimator(StateEstimator):
-    def __init__(self, priori: Discrete, kl_theshold:float = 0.7, smooth: bool=True):
-        super().__init__(priori)
+    def __init__(self, priori: Discrete, kl_theshold:float = 0.7, smooth: bool=True,
+                    window: int | None = None, decay: float | None = None):
+        super().__init__(priori, window, decay)
         self.kl_theshold = kl_theshold
         self.smooth = smooth
 
-    def is_fit(self, sequence: Sequence[int]) -> bool:
+    def is_fit(self, sequence: Sequence[int] | None = None) -> bool:
         estimated = self.estimate(sequence)
         return kl_divergence(self.priori, estimated) < self.kl_theshold
 
-    def estimate(self, sequence: Sequence[int]) -> Discrete:
-
-        if self.smooth:
-            weights = [max(sequence.count(i), 1)  for i in self.priori.items]
-        else:
-            weights = [sequence.count(i) for i in self.priori.items]
-
-        probs = [w / sum(weights) for w in weights]
-        return Discrete(probs, self.priori.items)
-
-    def update_priori(self, sequence: Sequence[int]):
-        """Smoothed update"""
+    def estimate(self, sequence: Sequence[int] | None = None) -> Discrete:
+        weights = self._weights(sequence)
         if self.smooth:
-            # weights = [dist.p(i) * len(self.priori.items) for i in self.priori.items]
-            # probs = [(dist.p(i) + 0.01) / (len(self.priori.items)*0.01 +1) 
-                        # for i in self.priori.items]
-            weights = [max(sequence.count(i), 1) for i in self.priori.items]
-
-            probs = [w / sum(weights) for w in weights]
-            self.priori = Discrete(probs , self.priori.items)
-        else:
-            return super().update_priori(sequence)
+            # every item size keeps at least one count
+            weights = np.maximum(weights, 1)
+        return self._discrete(weights)
 
 class KernelDensityEstimator(StateEstimator):
-    def __init__(self, priori: Discrete, kl_theshold:float = 0.1, memorize_all=True, bandwidth=2):
-        super().__init__(priori)
+    def __init__(self, priori: Discrete, kl_theshold:float = 0.1, memorize_all=True, bandwidth=2,
+                    window: int | None = None, decay: float | None = None):
+        super().__init__(priori, window, decay)
         # self.bandwidth = (max(self.priori.items) - min(self.priori.items)) / (len(self.priori.items) * 2)
         # self.bandwidth = (max(self.priori.items) - min(self.priori.items)) / (4)
         # print(self.bandwidth)
         self.bandwidth = bandwidth
-        self.memory = {i: 0 for i in self.priori.items}
+        self.memory = {i: 0. for i in self.priori.items}
         # print(self.bandwidth, max(self.priori.items), min(self.priori.items))
         self.memorize_all = memorize_all
         self.kl_theshold = kl_theshold
@@ -90,22 +148,15 @@ class KernelDensityEstimator(StateEstimator):
         self.model=KernelDensity(bandwidth=self.bandwidth)
         
 
-    def is_fit(self, sequence: Sequence[int]) -> bool:
+    def is_fit(self, sequence: Sequence[int] | None = None) -> bool:
         estimated = self.estimate(sequence)
         # print(estimated)
         # print(kl_divergence(self.priori, estimated))
         return kl_divergence(self.priori, estimated) < self.kl_theshold
         
-    def estimate(self, sequence: Sequence[int]) -> Discrete:
-        
-        
-        new_estimate = self.memory.copy()
-        for i in sequence:
-            new_estimate[i] += 1
-
-        total = sum(new_estimate.values())
-        probs = [new_estimate.get(item) / total for item in self.priori.items]
-        return Discrete(probs, self.priori.items)
+    def estimate(self, sequence: Sequence[int] | None = None) -> Discrete:
+        memory = np.array([self.memory[i] for i in self.priori.items], dtype=float)
+        return self._discrete(memory + self._weights(sequence))
         
         # self.model.fit(np.asarray(sequence).reshape((-1, 1)))
         # logits = self.model.score_samples(np.asarray(self.priori.items).reshape((-1, 1)))
@@ -118,15 +169,21 @@ class KernelDensityEstimator(StateEstimator):
         
         # return Discrete(probs, self.priori.items)
 
-    def update_priori(self, sequence: Sequence[int]):
+    def update_priori(self, sequence: Sequence[int] | None = None):
         
         # self.model.fit(np.asarray(sequence).reshape((-1, 1)))
-        data = np.asarray(sequence)
-        self.model.fit(data[:, None])
+        weights = self._weights(sequence)
+        if sequence is None:
+            # item sizes weighted by the streamed counts
+            observed = weights > 0
+            self.model.fit(np.asarray(self.priori.items)[observed, None], sample_weight=weights[observed])
+        else:
+            data = np.asarray(sequence)
+            self.model.fit(data[:, None])
         if self.memorize_all:
             # self.memory += list(sequence)
-            for i in sequence:
-                self.memory[i] += 1
+            for i, w in zip(self.priori.items, weights):
+                self.memory[i] += w
 
         logits = self.model.score_samples(np.asarray(self.priori.items).reshape((-1, 1)))
         # probs = np.exp(probs).tolist()
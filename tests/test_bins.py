@@ -1,5 +1,6 @@
 import json
-from bpp1d.structure import BinPattern, BppBin, BinWithPattern
+import pickle
+from bpp1d.structure import BinPattern, BppBin, BinWithPattern, BinStore, BinSolution
 import pytest
 
 TEST_CASES = [
@@ -71,3 +72,72 @@ def test_bin_pattern(pattern, items, expected):
 
 
 
+def test_bin_fill_level():
+    bppbin = BppBin(TEST_CAPACITY, [2, 3])
+    assert bppbin.filled_space == 5 and bppbin.empty_space == 5
+
+    bppbin[0] = 4
+    assert bppbin.items == [4, 3]
+    assert bppbin.filled_space == 7
+
+    bppbin.pack(3)
+    assert bppbin.full
+
+    bppbin.items = [1]
+    assert bppbin.filled_space == 1 and not bppbin.full
+
+    with pytest.raises(AttributeError):
+        bppbin.level = 1
+
+
+def test_bin_store():
+    store = BinStore(TEST_CAPACITY, size=2)
+    store.append(BppBin(TEST_CAPACITY, [5, 3]))
+    idx = store.open([4])
+    store[idx].pack(6)
+    for _ in range(3):
+        store.open([1])
+
+    assert len(store) == 5
+    assert store[0].items == [5, 3]
+    assert store[idx].full and store[idx].items == [4, 6]
+    assert store.levels.tolist() == [8, 10, 1, 1, 1]
+    assert store.counts.tolist() == [2, 2, 1, 1, 1]
+    assert [store.residual_of(i) for i in range(len(store))] == store.residuals.tolist()
+
+    store[0][1] = 2
+    assert store[0].filled_space == 7
+    assert store.index(store[-1]) == 4
+
+    with pytest.raises(ValueError):
+        store[0].pack(4)
+
+    pattern_idx = store.open([5], pattern=BinPattern((5, 3, 2)))
+    assert store[pattern_idx].check() == ([5], [2, 3], [])
+
+
+def test_pattern_interning():
+    pattern = BinPattern((5, 3, 2, 3))
+    assert pattern is BinPattern([3, 2, 5, 3])
+    assert pattern is BinPattern.from_counts([1, 2, 0, 1], [2, 3, 4, 5])
+    assert pattern is pickle.loads(pickle.dumps(pattern))
+    assert pattern.as_dict() == {2: 1, 3: 2, 5: 1}
+    assert 3 in pattern and 4 not in pattern
+
+    assert pattern.to_np([2, 3, 4, 5]).tolist() == [1, 2, 0, 1]
+    matrix = BinPattern.encode([pattern, BinPattern((4, 4, 2))], [2, 3, 4, 5])
+    assert matrix.tolist() == [[1, 2, 0, 1], [1, 0, 2, 0]]
+
+
+def test_bin_solution_metrics():
+    bins = [BppBin(TEST_CAPACITY, [5, 5]), BppBin(TEST_CAPACITY),
+            BppBin(TEST_CAPACITY, [3, 4]), BppBin(TEST_CAPACITY, [2])]
+    solution = BinSolution(TEST_CAPACITY, bins)
+    store_solution = BinSolution(TEST_CAPACITY, BinStore(TEST_CAPACITY, bins))
+
+    expected = {'capacity': 10, 'item_count': 5, 'bins': 3, 'waste': 11, 'filled_rate': 1 / 3}
+    assert solution.metrics == expected
+    assert store_solution.metrics == expected
+    assert store_solution.data_obj == solution.data_obj
+    assert solution.min_filled_bin.items == [2]
+    assert solution[1:].metrics['bins'] == 2
@@ -1,7 +1,11 @@
 from typing import Dict, Sequence
 import pytest
 
+from bpp1d.models import cg_fit
 from bpp1d.models.cg_fit import CGFit
+from bpp1d.models.mip import PlanCache
+from bpp1d.structure import BinPattern
+from bpp1d.utils.heuristic_choice import best_fit_choice
 
 TEST_CASES = [
     {
@@ -41,6 +45,57 @@ def test_cg_fit(capacity: int, instance: Sequence[int], demands: Dict[int, int])
     assert solution.total_items == len(instance)
 
 
+def test_cg_fit_indexed_fallback(monkeypatch):
+    capacity, instance = 10, [5, 4, 4, 3, 3, 3, 3, 3, 2, 2, 2, 2, 2, 2] * 20
+    demands = {5: 1, 4: 2, 3: 4, 2: 5}
+    bins = []
+    for linear in [False, True]:
+        if linear:
+            monkeypatch.setattr(cg_fit, 'BestFitChoice', lambda: best_fit_choice)
+        model = CGFit(capacity, instance, demands)
+        model.build()
+        model.solve()
+        bins.append([list(b.items) for b in model.bins])
+    assert bins[0] == bins[1]
 
 
 
+
+
+
+
+def test_cg_fit_plan_cache(tmp_path):
+    capacity, instance, demands = TEST_CASES[1]['capacity'], TEST_CASES[1]['instance'], TEST_CASES[1]['demands']
+    cache = PlanCache(path=tmp_path)
+
+    first = CGFit(capacity, instance, demands, plan_cache=cache)
+    first.build()
+    assert first.plan is not None
+    expected = dict(first.plan.plan_dict)
+    _, info = first.solve()
+    assert info is not None and info["plan_cache_misses"] == 1 and info["plan_cache_hits"] == 0
+
+    second = CGFit(capacity, instance, dict(demands), plan_cache=cache)
+    second.build()
+    assert second.plan is not None and second.plan.plan_dict == expected
+    _, info = second.solve()
+    assert info is not None and info["plan_cache_hits"] == 1
+
+    # a new process sees the plan on disk
+    assert PlanCache(path=tmp_path).get(PlanCache.key(capacity, demands, {})) == expected
+
+    other = CGFit(capacity, instance, demands, cg_options={"finish": "round"}, plan_cache=cache)
+    other.build()
+    assert other.cg_info["plan_cache_misses"] == 1
+
+
+def test_plan_cache_lru():
+    cache = PlanCache(maxsize=2)
+    keys = [PlanCache.key(10, {2: d, 3: 0}) for d in range(3)]
+    for d, key in enumerate(keys):
+        cache.put(key, {BinPattern([2] * 5): d + 1})
+    assert len(cache) == 2
+    assert cache.get(keys[0]) is None
+    assert cache.get(keys[2]) == {BinPattern([2] * 5): 3}
+    assert PlanCache.key(10, {3: 0, 2: 1}) == keys[1]
+    assert (cache.hits, cache.misses) == (1, 1)
@@ -0,0 +1,155 @@
+from collections import Counter
+import math
+import random
+import pytest
+from bpp3d_dataset.utils.distributions import Discrete
+
+from bpp1d.models import cg_replan
+from bpp1d.models.cg_replan import CGReplan
+from bpp1d.structure import BinPattern
+from bpp1d.structure.bpp_bin import BinWithPattern
+from bpp1d.structure.bpp_plan import BinPlanExecutor
+from bpp1d.utils.demand_estimator import DiscreteDemandEstimator
+from bpp1d.utils.heuristic_choice import best_fit_choice
+
+
+@pytest.mark.parametrize('async_replan', [False, True])
+@pytest.mark.parametrize('scale_tolerance, delta_gap', [(None, None), (0.1, None), (None, 0.03)])
+def test_cg_replan(async_replan: bool, scale_tolerance: float | None, delta_gap: float | None):
+    items = list(range(10, 60, 2))
+    rng = random.Random(0)
+    instance = [rng.choice(items) for _ in range(3000)]
+    distribution = Discrete([1 / len(items)] * len(items), items)
+
+    model = CGReplan(100, instance, distribution, consider_opened_bins=True, async_replan=async_replan,
+                        scale_tolerance=scale_tolerance, delta_gap=delta_gap, end_heuristic_theshold=0.02,
+                        cg_options={"enumeration_limit": 0, "finish": "round"})
+    model.build()
+    solution, info = model.solve()
+
+    assert solution.total_items == len(instance)
+    assert all(0 < b.filled_space <= 100 for b in model.bins)
+    assert sorted(i for b in model.bins for i in b.items) == sorted(instance)
+    assert info is not None and info["replan_count"] > 0
+    assert 0 <= info["latency_p50"] <= info["latency_p99"] <= info["latency_max"]
+
+
+def test_cg_replan_scaled_plans():
+    items = list(range(10, 60, 2))
+    distribution = Discrete([1 / len(items)] * len(items), items)
+    model = CGReplan(100, [10] * 1000, distribution, scale_tolerance=0.1,
+                        cg_options={"enumeration_limit": 0, "finish": "round"})
+    model.build()
+    assert "scaled_plans" not in model.cg_info
+
+    # same direction, half the size: the last solved plan is scaled
+    halved = {i: d // 2 for i, d in model.demands.items()}
+    plan = model._column_generation(halved)
+    assert plan is not None and model.cg_info["scaled_plans"] == 1
+    for size, demand in halved.items():
+        assert sum(pattern.as_dict().get(size, 0) * count for pattern, count in plan.items()) >= demand
+
+    # demands concentrated on a few sizes are too far off, column generation runs again
+    iterations = model.cg_info["cg_iterations"]
+    skewed = {i: (200 if i < 20 else 1) for i in items}
+    assert model._column_generation(skewed) is not None
+    assert model.cg_info["scaled_plans"] == 1
+    assert model.cg_info["cg_iterations"] > iterations
+
+
+@pytest.mark.parametrize('delta_gap', [None, 0.03, 1.])
+def test_cg_replan_delta(delta_gap: float | None):
+    items = list(range(10, 60, 2))
+    rng = random.Random(0)
+    instance = [rng.choice(items) for _ in range(3000)]
+    distribution = Discrete([1 / len(items)] * len(items), items)
+
+    model = CGReplan(100, instance, distribution, consider_opened_bins=True, delta_gap=delta_gap,
+                        cg_options={"enumeration_limit": 0, "finish": "round"})
+    model.build()
+    solution, info = model.solve()
+
+    assert solution.total_items == len(instance)
+    assert info is not None and info["replan_count"] > 0
+    # without cache, table or scaling, every replan is either repaired or solved again
+    assert info.get("delta_replans", 0) + info.get("full_replans", 0) == info["replan_count"]
+    if delta_gap is None:
+        assert "delta_replans" not in info
+    elif delta_gap >= 1:
+        # the repaired plan never has twice the bins of the lower bound
+        assert info["delta_replans"] == info["replan_count"]
+    else:
+        assert info["delta_replans"] > 0
+
+
+def test_cg_replan_async_quality():
+    items = list(range(10, 60, 2))
+    rng = random.Random(0)
+    instance = [rng.choice(items) for _ in range(3000)]
+    distribution = Discrete([1 / len(items)] * len(items), items)
+
+    num_bins = {}
+    for async_replan in [False, True]:
+        model = CGReplan(100, instance, distribution, consider_opened_bins=True, async_replan=async_replan,
+                            cg_options={"enumeration_limit": 0, "finish": "round"})
+        model.build()
+        solution, _ = model.solve()
+        num_bins[async_replan] = len(solution.bins)
+    assert num_bins[True] <= 1.01 * num_bins[False]
+
+
+def test_cg_replan_indexed_fallback(monkeypatch):
+    items = list(range(10, 60, 2))
+    rng = random.Random(0)
+    instance = [rng.choice(items) for _ in range(3000)]
+    distribution = Discrete([1 / len(items)] * len(items), items)
+
+    bins = []
+    for linear in [False, True]:
+        if linear:
+            monkeypatch.setattr(cg_replan, 'BestFitChoice', lambda: best_fit_choice)
+        model = CGReplan(100, instance, distribution, consider_opened_bins=True, end_heuristic_theshold=0.02,
+                            cg_options={"enumeration_limit": 0, "finish": "round"})
+        model.build()
+        model.solve()
+        bins.append([list(b.items) for b in model.bins])
+    assert bins[0] == bins[1]
+
+
+def test_swap_plan():
+    items = list(range(10, 60, 2))
+    rng = random.Random(0)
+    instance = [rng.choice(items) for _ in range(3000)]
+    distribution = Discrete([1 / len(items)] * len(items), items)
+    model = CGReplan(100, instance, distribution, cg_options={"enumeration_limit": 0, "finish": "round"})
+    model.build()
+    model.plan_executor = BinPlanExecutor(model.plan, 100, model.bins)
+
+    # a plan for all items arrives once 1000 of them are placed
+    demands = dict(model.demands)
+    result = model._column_generation(demands)
+    assert result is not None
+    model._swap_plan(1000, result, demands, 0)
+
+    placed = Counter(instance[:1000])
+    assert model.demands == {size: max(d - placed[size], 0) for size, d in demands.items()}
+    for size, demand in model.demands.items():
+        assert sum(pattern.as_dict().get(size, 0) * count for pattern, count in model.plan.items()) >= demand
+    assert sum(model.plan.values()) < sum(result.values())
+
+
+@pytest.mark.parametrize('smooth', [False, True])
+def test_demand_estimator(smooth: bool):
+    items = [2, 3, 4, 5]
+    distribution = Discrete([0.4, 0.3, 0.2, 0.1], items)
+    bins = [BinWithPattern(10, BinPattern([5, 5]), [5, 3]), BinWithPattern(10, BinPattern([4, 4, 2]), [4, 2, 2]),
+            BinWithPattern(10, BinPattern([3, 3, 2]), [3, 3, 2, 2])]
+    estimator = DiscreteDemandEstimator(consider_opened_bins=True, smooth=smooth)
+
+    demands = estimator(distribution, 7, bins)
+    assert demands == estimator.estimate(distribution, 7, {3: 1, 2: 2})
+    expected = {i: max(math.ceil(7 * p), int(smooth)) for i, p in zip(items, [0.4, 0.3, 0.2, 0.1])}
+    expected[3] -= 1
+    expected[2] -= 2
+    assert demands == expected
+    assert DiscreteDemandEstimator(smooth=smooth)(distribution, 7, bins) == estimator.estimate(distribution, 7)
@@ -1,6 +1,16 @@
+import itertools
+import random
+import numpy as np
 import pytest
 from bpp1d.structure import BinPattern
 from bpp1d.models.mip import ColumnGeneration, MipSolverStatus
+from bpp1d.models.mip.pricing import knapsack_columns, solve_knapsack
+from bpp1d.models.mip.master import HighsMaster, IncrementalMaster
+from bpp1d.models.mip.column_pool import ColumnPool
+from bpp1d.models.mip.delta import restricted_plan
+from bpp1d.models.mip.plan_table import PlanTable, demand_grid
+from bpp1d.models.mip.rounding import ffd_counts, round_down, scale_plan
+from bpp1d.models.mip.enumeration import PatternEnumeration, generate_column_generation, maximal_patterns
 
 TEST_CASES = [
     
@@ -16,6 +26,9 @@ TEST_CASES = [
     }
 ]
 
+@pytest.mark.parametrize(('pricing', 'master', 'max_columns', 'finish'),
+                            [('dp', 'highs', 1, 'mip'), ('cbc', 'highs', 1, 'mip'), ('dp', 'pulp', 1, 'mip'),
+                                ('dp', 'highs', 5, 'mip'), ('dp', 'highs', 1, 'round')])
 @pytest.mark.parametrize(
     ('instance', 'capacity', 'expected_plan'), [
         (
@@ -30,16 +43,18 @@ TEST_CASES = [
 
     ]
 )
-def test_column_generation(instance, capacity, expected_plan):
+def test_column_generation(instance, capacity, expected_plan, pricing, master, max_columns, finish):
 
     items = sorted(set(instance))
 
     demands = {i: instance.count(i) for i in items}
 
-    cg = ColumnGeneration(capacity, demands)
+    cg = ColumnGeneration(capacity, demands, pricing=pricing, master=master,
+                            max_columns=max_columns, finish=finish)
     plan = cg.solve()
     assert plan is not None
     assert cg.status == MipSolverStatus.FINISHED
+    assert cg.info["cg_iterations"] >= 1
     # patterns = [key for key in expected_plan.keys()]
 
     plan_demand = {}
@@ -55,3 +70,230 @@ def test_column_generation(instance, capacity, expected_plan):
     #     assert key in patterns
     #     assert result[key] == expected_plan[key]
 
+
+
+
+
+@pytest.mark.parametrize('factor', [0.3, 0.5, 1.7])
+def test_scale_plan(factor):
+    items = list(range(10, 60, 5))
+    demands = {i: 60 for i in items}
+    plan = ColumnGeneration(100, demands).solve()
+    assert plan is not None
+
+    scaled_demands = {i: int(d * factor) + i % 3 for i, d in demands.items()}
+    scaled = scale_plan(plan, factor, scaled_demands, 100)
+    for item in items:
+        assert sum(pattern.as_dict().get(item, 0) * count for pattern, count in scaled.items()) >= scaled_demands[item]
+    assert all(sum(pattern.items) <= 100 for pattern in scaled)
+    # within the rounding loss of one bin per pattern of the plan
+    assert sum(scaled.values()) <= factor * sum(plan.values()) + len(plan) + 1
+
+@pytest.mark.parametrize(('capacity', 'items'), [(10, [2, 3, 4, 5]), (20, [3, 5, 7, 9]), (30, [13, 4, 7])])
+def test_maximal_patterns(capacity, items):
+    expected = {
+        counts
+        for counts in itertools.product(*[range(capacity // i + 1) for i in items])
+        if capacity - min(items) < sum(c * i for c, i in zip(counts, items)) <= capacity
+    }
+    patterns = maximal_patterns(capacity, items)
+    assert patterns is not None
+    assert {tuple(p) for p in patterns} == expected
+    assert len(patterns) == len(expected)
+    assert maximal_patterns(capacity, items, limit=len(expected) - 1) is None
+
+
+def test_pattern_enumeration():
+    items = list(range(10, 60, 5))
+    demands = {i: 50 for i in items}
+
+    enumerated = generate_column_generation(100, demands)
+    assert isinstance(enumerated, PatternEnumeration)
+    plan = enumerated.solve()
+    assert plan is not None
+    assert enumerated.status == MipSolverStatus.FINISHED
+    for item in items:
+        assert sum(pattern.as_dict().get(item, 0) * count for pattern, count in plan.items()) >= demands[item]
+
+    cg = generate_column_generation(100, demands, enumeration_limit=0)
+    assert not isinstance(cg, PatternEnumeration)
+    cg_plan = cg.solve()
+    assert cg_plan is not None
+    assert enumerated.info["cg_lp_objective"] == pytest.approx(cg.info["cg_lp_objective"])
+    assert sum(plan.values()) == sum(cg_plan.values())
+
+
+def test_column_pool():
+    items = list(range(10, 60, 2))
+    demands = {i: 20 for i in items}
+    pool = ColumnPool(max_age=1)
+
+    cold = ColumnGeneration(100, demands, column_pool=pool)
+    cold.solve(max_iter=1000)
+    assert len(pool) > 0
+
+    rng = random.Random(3)
+    shifted = {i: d + rng.randint(-5, 5) for i, d in demands.items()}
+    warm = ColumnGeneration(100, shifted, column_pool=pool)
+    plan = warm.solve(max_iter=1000)
+    assert plan is not None and warm.status == MipSolverStatus.FINISHED
+    assert warm.info["cg_pooled_columns"] > 0
+    assert warm.info["cg_iterations"] < cold.info["cg_iterations"]
+    reference = ColumnGeneration(100, shifted)
+    reference.solve(max_iter=1000)
+    assert warm.info["cg_lp_objective"] == pytest.approx(reference.info["cg_lp_objective"])
+
+    # unused columns are pruned once older than max_age, the pool only keeps item sizes it is asked for
+    for _ in range(2):
+        pool.update(np.zeros((0, len(items)), dtype=int), np.zeros(0), items)
+    assert len(pool) == 0
+    pool.update(np.array([[2, 1]]), np.array([1.]), [30, 40])
+    assert pool.columns([30, 40]).tolist() == [[2, 1]]
+    assert len(pool.columns([30, 20])) == 0
+
+
+def test_restricted_plan():
+    items = list(range(10, 60, 2))
+    demands = {i: 20 for i in items}
+    full = ColumnGeneration(100, demands, finish='round')
+    full_plan = full.solve(max_iter=1000)
+    assert full_plan is not None
+    columns = BinPattern.encode(full_plan, items)
+
+    rng = random.Random(5)
+    shifted = {i: d + rng.randint(-3, 3) for i, d in demands.items()}
+    plan, lower_bound = restricted_plan(100, shifted, columns)
+    covered = {i: 0 for i in items}
+    for pattern, count in plan.items():
+        assert sum(pattern.items) <= 100
+        for size, num in pattern.as_dict().items():
+            covered[size] += num * count
+    assert all(covered[i] >= shifted[i] for i in items)
+
+    reference = ColumnGeneration(100, shifted)
+    reference.solve(max_iter=1000)
+    assert lower_bound <= np.ceil(reference.info["cg_lp_objective"] - 1e-6)
+    assert lower_bound <= sum(plan.values())
+
+
+def test_plan_table(tmp_path):
+    items = [3, 5, 7, 9]
+    probs = [0.4, 0.3, 0.2, 0.1]
+    demands = demand_grid(items, probs, range(10, 101, 10), opened_states=2, opened_items=3)
+    assert len(demands) >= 10 and (demands >= 0).all()
+
+    table = PlanTable.build(20, items, demands, {"finish": "round"}, workers=2)
+    assert len(table) == len(demands)
+    table.save(tmp_path / "table.npz")
+    table = PlanTable.load(tmp_path / "table.npz")
+
+    query = {3: 21, 5: 15, 7: 10, 9: 5}
+    plan = table.nearest(20, query, tolerance=0.1)
+    assert plan is not None
+    for item, demand in query.items():
+        assert sum(pattern.as_dict().get(item, 0) * count for pattern, count in plan.items()) >= demand
+    assert all(sum(pattern.items) <= 20 for pattern in plan)
+
+    assert table.nearest(20, {3: 500, 5: 0, 7: 0, 9: 0}) is None
+    assert table.nearest(30, query) is None
+    assert table.nearest(20, {3: 21, 5: 15}) is None
+
+@pytest.mark.parametrize(('max_iter', 'time_budget'), [(1, None), (100, 0.)])
+def test_column_generation_anytime(max_iter, time_budget):
+    items = list(range(10, 60))
+    demands = {i: 20 for i in items}
+
+    cg = ColumnGeneration(100, demands, time_budget=time_budget)
+    plan = cg.solve(max_iter=max_iter)
+    assert plan is not None
+    assert cg.status == MipSolverStatus.TIMEOUT
+
+    for item in items:
+        assert sum(pattern.as_dict().get(item, 0) * count for pattern, count in plan.items()) >= demands[item]
+    assert 0 < cg.info["cg_lower_bound"] <= sum(plan.values()) == cg.info["cg_bins"]
+    assert cg.info["cg_gap"] >= 0
+
+    converged = ColumnGeneration(100, demands, finish='round')
+    converged.solve(max_iter=1000)
+    assert converged.status == MipSolverStatus.FINISHED
+    assert cg.info["cg_lower_bound"] <= converged.info["cg_lower_bound"]
+
+@pytest.mark.parametrize('bounded', [False, True])
+def test_knapsack_pricing(bounded: bool):
+    rng = random.Random(0)
+    capacity = 20
+    weights = [3, 5, 7, 9]
+    for _ in range(20):
+        values = [rng.uniform(-0.1, 1) for _ in weights]
+        bounds = [rng.randint(0, 4) for _ in weights] if bounded else [capacity // w for w in weights]
+
+        best = max(
+            sum(c * v for c, v in zip(counts, values))
+            for counts in itertools.product(*[range(b + 1) for b in bounds])
+            if sum(c * w for c, w in zip(counts, weights)) <= capacity
+        )
+        value, counts = solve_knapsack(values, weights, capacity, bounds if bounded else None)
+
+        assert value == pytest.approx(best)
+        assert sum(c * v for c, v in zip(counts, values)) == pytest.approx(best)
+        assert sum(c * w for c, w in zip(counts, weights)) <= capacity
+        assert all(c <= b for c, b in zip(counts, bounds))
+
+
+
+@pytest.mark.parametrize('bounded', [False, True])
+def test_knapsack_columns(bounded: bool):
+    rng = random.Random(1)
+    capacity = 30
+    weights = [4, 6, 7, 11, 13]
+    for _ in range(20):
+        values = [rng.uniform(-0.1, 1) for _ in weights]
+        bounds = [rng.randint(1, 4) for _ in weights] if bounded else None
+        columns = knapsack_columns(values, weights, capacity, 4, bounds)
+        best, _ = solve_knapsack(values, weights, capacity, bounds)
+
+        assert 1 <= len(columns) <= 4
+        assert columns[0][0] == pytest.approx(best)
+        assert len({tuple(counts) for _, counts in columns}) == len(columns)
+        for value, counts in columns:
+            assert sum(c * v for c, v in zip(counts, values)) == pytest.approx(value)
+            assert sum(c * w for c, w in zip(counts, weights)) <= capacity
+            if bounds is not None:
+                assert all(c <= b for c, b in zip(counts, bounds))
+
+
+def test_rounding():
+    rng = np.random.default_rng(2)
+    capacity = 50
+    items = [7, 11, 13, 20, 26]
+    for _ in range(20):
+        counts = rng.integers(0, 30, size=len(items))
+        bins, usage = ffd_counts(counts, items, capacity)
+        assert (bins.T @ usage == counts).all()
+        assert (bins @ np.array(items) <= capacity).all()
+        assert (usage > 0).all()
+
+        patterns = np.diag([capacity // i for i in items])
+        x = rng.uniform(0, 5, size=len(items))
+        rounded, rounded_usage = round_down(patterns, x, counts, items, capacity)
+        assert (rounded.T @ rounded_usage >= counts).all()
+        assert (rounded_usage[:len(items)] == np.floor(x)).all()
+
+@pytest.mark.parametrize('sparse', [False, True])
+def test_incremental_master(sparse: bool):
+    rng = np.random.default_rng(0)
+    demands = rng.integers(1, 10, size=5)
+    backend = HighsMaster()
+    warm = backend.incremental(demands, sparse)
+    cold = IncrementalMaster(backend, demands, sparse)
+    columns = np.diag(rng.integers(1, 4, size=5))
+    for _ in range(5):
+        warm.add_columns(columns)
+        cold.add_columns(columns)
+        assert (warm.patterns == cold.patterns).all()
+        objective, x, duals = warm.solve()
+        expected, _, _ = backend.solve(cold.patterns, demands)
+        assert objective == pytest.approx(expected)
+        assert (warm.patterns.T @ x >= demands - 1e-6).all()
+        assert duals is not None and (duals >= -1e-9).all()
+        columns = rng.integers(0, 3, size=(2, 5))
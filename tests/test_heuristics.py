@@ -1,7 +1,13 @@
 from typing import List, Sequence
+import random
 import pytest
 
 from bpp1d.models import HeuristicModel
+from bpp1d.models.heruistics import HarmonicKModel, LevelHeuristicModel
+from bpp1d.utils.heuristic_choice import BestFitChoice, FirstFitChoice, best_fit_choice, first_fit_choice, \
+    worst_fit_level, SumOfSquaresChoice
+from bpp1d.structure import BinPattern, BppBin, LevelHistogram
+from bpp1d.structure.bpp_plan import BinPlanExecutor, BppPlan
 
 TEST_CASES_BF = [
     {
@@ -30,3 +36,137 @@ def test_best_fit(capacity: int, instance: Sequence[int], expected: List[List[in
     assert len(solution.bins) == len(expected)
     for bin, exp in zip(solution.bins, expected):
         assert bin.items == exp
+
+
+@pytest.mark.parametrize(('capacity', 'seed', 'choice_fn', 'indexed_fn'), [
+    (10, 0, best_fit_choice, BestFitChoice),
+    (100, 1, best_fit_choice, BestFitChoice),
+    (10, 0, first_fit_choice, FirstFitChoice),
+    (100, 1, first_fit_choice, FirstFitChoice),
+])
+def test_indexed_choice(capacity: int, seed: int, choice_fn, indexed_fn):
+    rng = random.Random(seed)
+    instance = [rng.randint(1, capacity) for _ in range(500)]
+
+    reference = HeuristicModel(capacity, instance, choice_fn=choice_fn)
+    indexed = HeuristicModel(capacity, instance, choice_fn=indexed_fn())
+    ref_solution, _ = reference.solve()
+    solution, _ = indexed.solve()
+
+    assert [b.items for b in solution.bins] == [b.items for b in ref_solution.bins]
+
+
+@pytest.mark.parametrize(('choice_fn', 'indexed_fn'), [
+    (best_fit_choice, BestFitChoice),
+    (first_fit_choice, FirstFitChoice),
+])
+def test_indexed_choice_fallback(choice_fn, indexed_fn):
+    # the executor packs bins through their pattern slots behind the choice's back
+    rng = random.Random(0)
+    plan = {BinPattern((5, 3, 2)): 20, BinPattern((4, 4, 2)): 20, BinPattern((6, 4)): 10}
+    reference = BinPlanExecutor(BppPlan(plan, 10), 10, [])
+    executor = BinPlanExecutor(BppPlan(plan, 10), 10, [])
+    indexed = indexed_fn()
+    for _ in range(400):
+        item = rng.choice([2, 3, 4, 5, 6, 7])
+        assert executor.put(item, indexed) == reference.put(item, choice_fn)
+    assert [b.items for b in executor.bins] == [b.items for b in reference.bins]
+    # packs are only recorded for indexed choices
+    assert reference._packed is None
+
+    # bins packed without update are re-read when chosen, so the choice always fits
+    bins = [BppBin(10) for _ in range(20)]
+    indexed = indexed_fn()
+    for _ in range(400):
+        for b in bins:
+            if not b.full and rng.random() < 0.05:
+                b.pack(1)
+        item = rng.randint(1, 4)
+        choice = indexed(item, bins)
+        assert choice == -1 or bins[choice].empty_space >= item
+        if choice < 0:
+            bins.append(BppBin(10, [item]))
+        else:
+            bins[choice].pack(item)
+
+
+@pytest.mark.parametrize(('model_cls', 'kwargs'), [
+    (HeuristicModel, {'choice_fn': best_fit_choice}),
+    (HeuristicModel, {'choice_fn': first_fit_choice}),
+    (HeuristicModel, {}),
+    (HarmonicKModel, {'K': 5}),
+])
+def test_bin_store_models(model_cls, kwargs):
+    rng = random.Random(0)
+    instance = [rng.randint(1, 100) for _ in range(500)]
+
+    reference = model_cls(100, instance, **kwargs)
+    model = model_cls(100, instance, bin_store=True, **kwargs)
+    reference.build()
+    model.build()
+    ref_solution, _ = reference.solve()
+    solution, _ = model.solve()
+
+    assert [b.items for b in solution.bins] == [b.items for b in ref_solution.bins]
+    assert solution.metrics == ref_solution.metrics
+
+
+@pytest.mark.parametrize(('capacity', 'seed'), [(10, 0), (100, 1)])
+def test_level_best_fit(capacity: int, seed: int):
+    rng = random.Random(seed)
+    instance = [rng.randint(1, capacity) for _ in range(500)]
+
+    ref_solution, _ = HeuristicModel(capacity, instance).solve()
+    solution, _ = LevelHeuristicModel(capacity, instance).solve()
+
+    potential = [0] * capacity
+    for b in ref_solution.bins:
+        if not b.full:
+            potential[b.filled_space] += 1
+    assert solution.potential == potential
+    assert solution.num_bins == ref_solution.num_bins
+    assert solution.waste == ref_solution.waste
+
+
+def test_level_worst_fit():
+    model = LevelHeuristicModel(10, [5, 4, 3, 2, 6], choice_fn=worst_fit_level, record_choices=True)
+    solution, _ = model.solve()
+
+    assert solution.choice_sequence == [[5, 0], [4, 5], [3, 0], [2, 3], [6, 0]]
+    assert solution.filled_bins == 0
+    assert solution.num_bins == 3
+
+
+def _sum_of_squares(levels: LevelHistogram, dead_end: Sequence[bool]) -> int:
+    return sum(int(n) ** 2 for h, n in enumerate(levels.potential) if h > 0 and not dead_end[h])
+
+
+@pytest.mark.parametrize(('capacity', 'items'), [(10, None), (20, [6, 8, 10])])
+def test_sum_of_squares(capacity: int, items: List[int] | None):
+    rng = random.Random(0)
+    choice_fn = SumOfSquaresChoice(items)
+    levels = LevelHistogram(capacity)
+    dead_end = [False] * (capacity + 1) if items is None else \
+        [not any(sum(c) == capacity - h for c in _combinations(items, capacity)) for h in range(capacity + 1)]
+
+    for _ in range(200):
+        item = rng.choice(items) if items is not None else rng.randint(1, capacity)
+        scores = {}
+        for h in [0] + [h for h in levels.nonempty if h + item <= capacity]:
+            trial = LevelHistogram(capacity)
+            trial.potential = levels.potential.copy()
+            trial.nonempty = list(levels.nonempty)
+            trial.pack(item, h)
+            creates_dead_end = h + item < capacity and dead_end[h + item]
+            scores[h] = (creates_dead_end, _sum_of_squares(trial, dead_end), -h)
+
+        choice = choice_fn(item, levels)
+        assert choice == min(scores, key=lambda h: scores[h])
+        levels.pack(item, choice)
+
+
+def _combinations(items: List[int], capacity: int) -> List[List[int]]:
+    combinations: List[List[int]] = [[]]
+    for c in combinations:
+        combinations += [c + [i] for i in items if (not c or i >= c[-1]) and sum(c) + i <= capacity]
+    return combinations
@@ -1,8 +1,10 @@
+from collections import Counter
 from typing import List
 import pytest
 from bpp1d.structure.bin_pattern import BinPattern
 from bpp1d.structure.bpp_plan import BinPlanExecutor, BppPlan
-from bpp1d.utils.heuristics import best_fit_choice
+from bpp1d.structure.bin_store import BinStore
+from bpp1d.utils.heuristic_choice import best_fit_choice
 import random
 
 
@@ -90,12 +92,60 @@ def test_plan_perfect(plan: BppPlan, items: List[int]):
 )
 def test_plan_not_perfect(plan: BppPlan, items: List[int], expected: List[List[int]]):
     executor = BinPlanExecutor(plan, TEST_CAPACITY, [])
+    store_executor = BinPlanExecutor(plan, TEST_CAPACITY, BinStore(TEST_CAPACITY))
 
     for i in items:
         executor.put(i, best_fit_choice)
+        store_executor.put(i, best_fit_choice)
 
     assert len(executor.bins) == len(expected)
 
     
     for bin, exp in zip(executor.bins, expected):
         assert bin.items == exp
+
+    for bin, store_bin in zip(executor.bins, store_executor.bins):
+        assert bin.items == store_bin.items and bin.pattern == store_bin.pattern
+
+
+def test_plan_slot_index():
+    rng = random.Random(0)
+    plan = _plan_creation({(5, 3, 2): 20, (4, 4, 2): 20, (3, 3, 2, 2): 10, (6, 4): 10})
+    executor = BinPlanExecutor(plan, TEST_CAPACITY, [])
+
+    for _ in range(300):
+        item = rng.choice([2, 3, 4, 5, 6])
+        expected = next((idx for idx, b in enumerate(executor.bins) 
+                            if item in b.check()[1] and b.empty_space >= item), -1)
+        choice = executor.put(item, best_fit_choice)
+        if expected >= 0:
+            assert choice == expected
+
+
+def test_plan_match():
+    rng = random.Random(0)
+    plan = _plan_creation({(5, 3, 2): 3, (4, 4, 2): 5, (3, 3, 2, 2): 5, (6, 4): 1, (2, 2, 2, 2, 2): 2})
+
+    for step in range(100):
+        item = rng.choice([2, 3, 4, 5, 6])
+        candidates = {k: v for k, v in plan.items() if item in k and v > 0}
+        expected = max(candidates, key=lambda k: candidates[k]) if candidates else None
+
+        pattern = plan.match(item)
+        assert pattern == expected
+        if pattern is not None:
+            plan.useone(pattern)
+        if step % 10 == 0:
+            plan = plan.copy()
+            plan[BinPattern((4, 4, 2))] = plan[BinPattern((4, 4, 2))] + 2
+
+
+def test_plan_unplanned_items():
+    rng = random.Random(1)
+    plan = _plan_creation({(5, 3, 2): 5, (4, 4, 2): 5, (6, 4): 3})
+    executor = BinPlanExecutor(plan, TEST_CAPACITY, [])
+
+    for _ in range(100):
+        executor.put(rng.choice([2, 3, 4, 5, 6]), best_fit_choice)
+        expected = Counter(i for b in executor.bins if not b.full for i in b.check()[2])
+        assert +Counter(executor.unplanned_items) == expected
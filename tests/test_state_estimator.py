@@ -0,0 +1,63 @@
+import random
+import numpy as np
+import pytest
+from bpp3d_dataset.utils.distributions import Discrete
+
+from bpp1d.utils.state_estimator import KernelDensityEstimator, SimpleStateEstimator, StateEstimator
+
+
+ITEMS = [2, 3, 4, 5, 6]
+
+
+@pytest.mark.parametrize('smooth', [False, True])
+def test_streaming_estimate(smooth: bool):
+    rng = random.Random(0)
+    sequence = [rng.choice(ITEMS[:-1]) for _ in range(200)] + [7]
+    estimator = SimpleStateEstimator(Discrete([0.2] * 5, ITEMS), smooth=smooth)
+
+    for step, item in enumerate(sequence):
+        estimator.observe(item)
+        if step % 20 == 0:
+            streamed = estimator.estimate()
+            expected = estimator.estimate(sequence[:step + 1])
+            assert streamed.items == expected.items
+            assert np.allclose([streamed.p(i) for i in ITEMS], [expected.p(i) for i in ITEMS])
+            assert estimator.is_fit() == estimator.is_fit(sequence[:step + 1])
+    # sizes outside the priori are ignored, smoothing keeps a count for unseen sizes
+    assert estimator.counts.sum() == len(sequence) - 1
+    assert (estimator.estimate().p(6) > 0) == smooth
+
+
+def test_kernel_density_streaming():
+    rng = random.Random(0)
+    sequence = [rng.choice(ITEMS) for _ in range(100)]
+    streamed = KernelDensityEstimator(Discrete([0.2] * 5, ITEMS))
+    reference = KernelDensityEstimator(Discrete([0.2] * 5, ITEMS))
+    streamed.observe(sequence)
+
+    assert np.allclose([streamed.estimate().p(i) for i in ITEMS], [reference.estimate(sequence).p(i) for i in ITEMS])
+    assert streamed.is_fit() == reference.is_fit(sequence)
+    streamed.update_priori()
+    reference.update_priori(sequence)
+    assert np.allclose([streamed.priori.p(i) for i in ITEMS], [reference.priori.p(i) for i in ITEMS])
+    assert streamed.memory == reference.memory
+
+
+def test_window_and_decay():
+    sequence = [2] * 50 + [6] * 10
+    windowed = StateEstimator(Discrete([0.2] * 5, ITEMS), window=10)
+    decayed = StateEstimator(Discrete([0.2] * 5, ITEMS), decay=0.5)
+    windowed.observe(sequence)
+    decayed.observe(sequence)
+
+    assert windowed.estimate().p(6) == pytest.approx(1)
+    assert windowed.counts.sum() == 10
+    # the 50 items of size 2 weigh 0.5 ** 10 + 0.5 ** 11 + ... < 0.5 ** 9 in total
+    assert decayed.estimate().p(6) > 0.99
+    assert decayed.counts[-1] == pytest.approx(2 - 0.5 ** 9)
+
+    decayed.reset()
+    with pytest.raises(ValueError):
+        decayed.estimate()
+    with pytest.raises(ValueError):
+        StateEstimator(Discrete([0.2] * 5, ITEMS), window=10, decay=0.5)